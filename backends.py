@@ -0,0 +1,351 @@
+import math
+import random
+
+from bst import AVLTree, BinaryTree, _recount_ancestors, binTreeNode, bisection, counts_probes
+from btree import BTree
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    """Make a tree class selectable as ``name`` (``--tree name``).
+
+    The class takes ``(values, multiset=False, **options)`` and may offer a
+    ``from_keys`` bulk loader, which make_tree then prefers.
+    """
+    def decorator(cls):
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+register_backend('bst')(BinaryTree)
+register_backend('avl')(AVLTree)
+register_backend('btree')(BTree)
+
+
+def make_tree(name, keys=(), multiset=False, **options):
+    """Build a tree of backend ``name`` holding ``keys`` (a list or NumPy array).
+
+    ``options`` go to the constructor, e.g. ``order_stats=True`` for
+    O(log n) rank/select or ``use_finger=True`` for finger search in the
+    binary trees, or ``order`` for the B-tree.
+    """
+    cls = BACKENDS[name]
+    if hasattr(cls, 'from_keys'):  # bulk loaders
+        return cls.from_keys(keys, multiset=multiset, **options)
+    return cls(keys.tolist() if hasattr(keys, 'tolist') else keys, multiset=multiset, **options)
+
+
+def _is_red(node):
+    return node is not None and node.red
+
+
+class _RotatingTree(BinaryTree):
+    """Shared plumbing for backends that restructure with rotations.
+
+    Deleting splices the node out BST-style (see ``_splice``) instead of
+    going through binTreeNode._remove, and heights are recomputed lazily.
+    """
+
+    def _rotate_left(self, node):
+        top = node.rotate_left()
+        if top.parent is None:
+            self.root = top
+        return top
+
+    def _rotate_right(self, node):
+        top = node.rotate_right()
+        if top.parent is None:
+            self.root = top
+        return top
+
+    def _rotate_up(self, node):
+        """Rotate ``node`` above its parent."""
+        if node is node.parent.left:
+            return self._rotate_right(node.parent)
+        return self._rotate_left(node.parent)
+
+    def _splice(self, node):
+        """Unlink ``node`` (or its successor, whose key it takes over).
+
+        Returns ``(removed, child, parent)``: the node actually taken out,
+        the child that replaced it and that child's new parent.
+        """
+        if node.left and node.right:
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.key = successor.key
+            if node.count != successor.count:
+                node.count = successor.count
+            node = successor
+
+        parent = node.parent
+        child = node.left if node.left else node.right
+        if child:
+            child.parent = parent
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+
+        if node.sized:
+            _recount_ancestors(parent)
+        node.left = node.right = node.parent = None
+        return node, child, parent
+
+    def _unlink(self, node):
+        self._splice(node)
+
+    def delete_many(self, values):
+        # Rebalancing rotations can move a node still to be deleted under
+        # one whose successor is spliced out, which the one-walk delete of
+        # BinaryTree relies on never happening.
+        return self._delete_each(values)
+
+    def _inserted(self, leaf, depth):
+        self._height = None
+
+    def _deleted(self):
+        self._height = None
+
+
+class RedBlackNode(binTreeNode):
+    red = False  # the root and anything not yet coloured is black
+
+
+class SizedRedBlackNode(RedBlackNode):
+    sized = True
+
+
+@register_backend('rb')
+class RedBlackTree(_RotatingTree):
+    """Red-black tree: at most two rotations per insert and three per delete."""
+    tree_type = 'rb'
+    node_class = RedBlackNode
+    sized_node_class = SizedRedBlackNode
+
+    def _inserted(self, leaf, depth):
+        self._height = None
+        node = leaf
+        node.red = True
+        while _is_red(node.parent):
+            parent = node.parent
+            grand = parent.parent  # a red parent is never the root
+            if parent is grand.left:
+                uncle = grand.right
+                if _is_red(uncle):
+                    parent.red = uncle.red = False
+                    grand.red = True
+                    node = grand
+                    continue
+                if node is parent.right:
+                    self._rotate_left(parent)
+                    node, parent = parent, node
+                parent.red = False
+                grand.red = True
+                self._rotate_right(grand)
+            else:
+                uncle = grand.left
+                if _is_red(uncle):
+                    parent.red = uncle.red = False
+                    grand.red = True
+                    node = grand
+                    continue
+                if node is parent.left:
+                    self._rotate_right(parent)
+                    node, parent = parent, node
+                parent.red = False
+                grand.red = True
+                self._rotate_left(grand)
+        self.root.red = False
+
+    def _unlink(self, node):
+        removed, child, parent = self._splice(node)
+        if not removed.red:
+            self._delete_fixup(child, parent)
+
+    def _delete_fixup(self, node, parent):
+        """Restore the black height after a black node above ``node`` went away."""
+        while node is not self.root and not _is_red(node):
+            if node is parent.left:
+                sibling = parent.right
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._rotate_left(parent)
+                    sibling = parent.right
+                if not _is_red(sibling.left) and not _is_red(sibling.right):
+                    sibling.red = True
+                    node, parent = parent, parent.parent
+                    continue
+                if not _is_red(sibling.right):
+                    sibling.left.red = False
+                    sibling.red = True
+                    self._rotate_right(sibling)
+                    sibling = parent.right
+                sibling.red = parent.red
+                parent.red = False
+                sibling.right.red = False
+                self._rotate_left(parent)
+            else:
+                sibling = parent.left
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._rotate_right(parent)
+                    sibling = parent.left
+                if not _is_red(sibling.left) and not _is_red(sibling.right):
+                    sibling.red = True
+                    node, parent = parent, parent.parent
+                    continue
+                if not _is_red(sibling.left):
+                    sibling.right.red = False
+                    sibling.red = True
+                    self._rotate_left(sibling)
+                    sibling = parent.left
+                sibling.red = parent.red
+                parent.red = False
+                sibling.left.red = False
+                self._rotate_right(parent)
+            node = self.root
+        if node is not None:
+            node.red = False
+
+
+class TreapNode(binTreeNode):
+    def __init__(self, *args, **kwargs):
+        binTreeNode.__init__(self, *args, **kwargs)
+        self.priority = random.random()
+
+
+class SizedTreapNode(TreapNode):
+    sized = True
+
+
+@register_backend('treap')
+class Treap(_RotatingTree):
+    """Randomised BST kept in heap order of random node priorities."""
+    tree_type = 'treap'
+    node_class = TreapNode
+    sized_node_class = SizedTreapNode
+
+    def _inserted(self, leaf, depth):
+        self._height = None
+        while leaf.parent is not None and leaf.parent.priority < leaf.priority:
+            self._rotate_up(leaf)
+
+    def _unlink(self, node):
+        if node.left and node.right:
+            # Rotate the node down below its higher-priority child until it
+            # has at most one child, then splice it out.
+            while node.left and node.right:
+                if node.left.priority > node.right.priority:
+                    self._rotate_right(node)
+                else:
+                    self._rotate_left(node)
+        self._splice(node)
+
+
+@register_backend('splay')
+@counts_probes('search')
+class SplayTree(_RotatingTree):
+    """Self-adjusting BST: every search and insert moves the node it reached to the root."""
+    tree_type = 'splay'
+
+    def _splay(self, node):
+        if node.parent is not None:
+            self._height = None  # the rotations below reshape the tree
+        while node.parent is not None:
+            parent = node.parent
+            grand = parent.parent
+            if grand is None:
+                self._rotate_up(node)  # zig
+            elif (node is parent.left) == (parent is grand.left):
+                self._rotate_up(parent)  # zig-zig
+                self._rotate_up(node)
+            else:
+                self._rotate_up(node)  # zig-zag
+                self._rotate_up(node)
+
+    def search(self, value):
+        """Find ``value`` and splay it (or the last node looked at) to the root."""
+        current = self.root
+        last = None
+        while current is not None:
+            last = current
+            if value < current.key:
+                current = current.left
+            elif value > current.key:
+                current = current.right
+            else:
+                break
+        if last is not None:
+            self._splay(last)
+        return current
+
+    def _inserted(self, leaf, depth):
+        self._height = None
+        self._splay(leaf)
+
+
+@register_backend('scapegoat')
+class ScapegoatTree(_RotatingTree):
+    """Scapegoat tree: no balance data in the nodes.
+
+    An insert that lands deeper than log_{1/alpha}(n) rebuilds the subtree
+    of the lowest too-unbalanced ancestor with ``bisection``; once deletes
+    shrink the tree below ``alpha`` of its size since the last full rebuild,
+    the whole tree is rebuilt.
+    """
+    tree_type = 'scapegoat'
+    alpha = 2 / 3
+
+    def __init__(self, values=(), multiset=False, order_stats=False, use_finger=False):
+        self.max_size = 0
+        BinaryTree.__init__(self, values, multiset, order_stats, use_finger)
+
+    def _inserted(self, leaf, depth):
+        self._height = None
+        self.max_size = max(self.max_size, self._size)
+        if depth is None:  # appended or finger insert: measure it
+            depth = 1
+            node = leaf
+            while node.parent is not None:
+                depth += 1
+                node = node.parent
+        if depth - 1 <= math.log(self._size, 1 / self.alpha):
+            return
+        # Without subtree sizes the climb counts them: each step adds the
+        # node and its other subtree, so this costs O(size of the scapegoat).
+        child, node = leaf, leaf.parent
+        child_size = leaf.count
+        while True:
+            sibling = node.right if child is node.left else node.left
+            size = child_size + node.count + (sibling.size() if sibling else 0)
+            if child_size > self.alpha * size:
+                break
+            child, node, child_size = node, node.parent, size
+        self._rebuild(node)
+
+    def _deleted(self):
+        self._height = None
+        if self._size < self.alpha * self.max_size:
+            if self.root is not None:
+                self._rebuild(self.root)
+            self.max_size = self._size
+
+    def _rebuild(self, node):
+        self._finger = self._min = self._max = None  # they may point into the old subtree
+        parent = node.parent
+        keys, counts = node.in_order_counts()
+        subtree = bisection(keys, parent, counts=counts, tree_type=self.tree_type, node_class=self.node_class)
+        if parent is None:
+            self.root = subtree
+        elif parent.left is node:
+            parent.left = subtree
+        else:
+            parent.right = subtree
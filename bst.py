@@ -1,28 +1,67 @@
+import sys
+from bisect import bisect_left
+from contextlib import contextmanager
+from itertools import groupby, islice, repeat
+
+
 class binTreeNode:
+    count = 1  # krotność klucza w trybie multizbioru; zapisywana w węźle tylko gdy > 1
+    sized = False  # True in sizedTreeNode, which also keeps subtree_size
+
     def __init__(self, key=None, parent=None, left=None, right=None, tree_type='bst'):
         self.key = key
         self.parent = parent
         self.left = left
         self.right = right
         self.height = 1  
+        if self.sized:
+            self.subtree_size = 1  # liczba kluczy w poddrzewie, z powtórzeniami (rank/select)
         self.tree_type = tree_type  
 
     def insert(self, value):
-        if self.key:
-            if value < self.key:
-                if self.left is None:
-                    self.left = binTreeNode(key=value, parent=self)
-                else:
-                    self.left.insert(value)
-            elif value > self.key:
-                if self.right is None:
-                    self.right = binTreeNode(key=value, parent=self)
-                else:
-                    self.right.insert(value)
-        else:
+        """Insert ``value`` and return the root, which AVL rotations may change."""
+        if self.key is None:
             self.key = value
-        if self.tree_type == 'avl':
-            self.rebalance()
+            return self
+
+        leaf, _ = self._attach(value)
+        if leaf is not None and self.tree_type == 'avl':
+            return self.rebalance_from_node(leaf.parent)
+        return self
+
+    def _attach(self, value, multiset=False):
+        """Hang a new leaf for ``value``; return ``(leaf, depth)`` or ``(None, depth)`` for duplicates.
+
+        With ``multiset`` a duplicate bumps the count of the existing node
+        instead of being dropped.
+        """
+        node_class = type(self)  # backends may use binTreeNode subclasses
+        sized = self.sized
+        current = self
+        depth = 1
+        while True:
+            depth += 1
+            if sized:
+                current.subtree_size += 1
+            if value < current.key:
+                if current.left is None:
+                    current.left = node_class(key=value, parent=current, tree_type=self.tree_type)
+                    return current.left, depth
+                current = current.left
+            elif value > current.key:
+                if current.right is None:
+                    current.right = node_class(key=value, parent=current, tree_type=self.tree_type)
+                    return current.right, depth
+                current = current.right
+            else:
+                if multiset:
+                    current.count += 1
+                    return None, depth - 1
+                # Duplicate: undo the size bumps made on the way down.
+                while sized and current is not None:
+                    current.subtree_size -= 1
+                    current = current.parent
+                return None, depth - 1
 
     def findMin(self):
         current = self
@@ -37,94 +76,274 @@ class binTreeNode:
         return current.key
     
     def search(self, value):
-        if value < self.key and self.left:
-            return self.left.search(value)
-        elif value > self.key and self.right:
-            return self.right.search(value)
-        return self if self.key == value else None
+        current = self
+        while current is not None and current.key is not None:
+            if value < current.key:
+                current = current.left
+            elif value > current.key:
+                current = current.right
+            else:
+                return current
+        return None
     
     def delete(self, value):
+        """Delete ``value`` and return the root, which AVL rotations may change."""
         node = self.search(value)
         if not node:
-            return False
+            return self
+        return self._remove(node)
 
-        parent = node.parent
+    def _remove(self, node):
+        """Unlink ``node`` from the tree rooted at ``self`` and return the root."""
         if node.left and node.right:
             successor = node.right
             while successor.left:
                 successor = successor.left
             node.key = successor.key
-            return successor.delete(successor.key)
-        elif node.left or node.right:
-            child = node.left if node.left else node.right
-            if parent:
-                if parent.left == node:
-                    parent.left = child
-                else:
-                    parent.right = child
-            child.parent = parent
+            if node.count != successor.count:
+                node.count = successor.count
+            node = successor
+
+        parent = node.parent
+        child = node.left if node.left else node.right
+        if parent:
+            if parent.left is node:
+                parent.left = child
+            else:
+                parent.right = child
+            if child:
+                child.parent = parent
+        elif child:
+            # Removing the root itself: pull the only child up into it so the
+            # caller's reference stays valid.
+            node.key, node.left, node.right = child.key, child.left, child.right
+            if node.count != child.count:
+                node.count = child.count
+            for grandchild in (node.left, node.right):
+                if grandchild:
+                    grandchild.parent = node
+            node.update_height()
         else:
-            if parent:
-                if parent.left == node:
-                    parent.left = None
-                else:
-                    parent.right = None
+            node.key = None
+
+        # Recount rather than decrement: with multiset counts the path above a
+        # moved successor loses a different amount than the path above node.
+        if self.sized:
+            _recount_ancestors(parent)
 
         if self.tree_type == 'avl' and parent:
-            self.rebalance_from_node(parent)
+            return self.rebalance_from_node(parent)
+        return self
 
-        return True
+    def iter_pre_order(self):
+        if self.key is None:
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node.key
+            if node.count > 1:
+                yield from repeat(node.key, node.count - 1)
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def iter_in_order(self):
+        if self.key is None:
+            return
+        stack = []
+        current = self
+        while stack or current:
+            if current:
+                stack.append(current)
+                current = current.left
+            else:
+                current = stack.pop()
+                yield current.key
+                if current.count > 1:
+                    yield from repeat(current.key, current.count - 1)
+                current = current.right
+
+    def iter_in_order_morris(self):
+        """In-order generator using Morris threading: O(1) extra memory.
+
+        Empty right links of in-order predecessors are pointed back at their
+        successors while the walk runs, so the tree must not be read or
+        modified elsewhere until the generator is exhausted or closed. Closing
+        it early still finishes the walk (without yielding) to remove every
+        thread.
+        """
+        if self.key is None:
+            return
+        current = self
+        pending = False  # True while suspended at a yield
+        try:
+            while current:
+                if current.left is None:
+                    pending = True
+                    yield current.key
+                    if current.count > 1:
+                        yield from repeat(current.key, current.count - 1)
+                    pending = False
+                    current = current.right
+                    continue
+                pred = current.left
+                while pred.right and pred.right is not current:
+                    pred = pred.right
+                if pred.right is None:
+                    pred.right = current
+                    current = current.left
+                else:
+                    pred.right = None
+                    pending = True
+                    yield current.key
+                    if current.count > 1:
+                        yield from repeat(current.key, current.count - 1)
+                    pending = False
+                    current = current.right
+        finally:
+            if pending:
+                _morris_unthread(current.right)
+
+    def iter_reverse(self):
+        if self.key is None:
+            return
+        stack = []
+        current = self
+        while stack or current:
+            if current:
+                stack.append(current)
+                current = current.right
+            else:
+                current = stack.pop()
+                yield current.key
+                if current.count > 1:
+                    yield from repeat(current.key, current.count - 1)
+                current = current.left
 
+    def iter_post_order(self):
+        if self.key is None:
+            return
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                yield node.key
+                if node.count > 1:
+                    yield from repeat(node.key, node.count - 1)
+                continue
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            if node.left:
+                stack.append((node.left, False))
 
+    def iter_range(self, lo, hi):
+        """Yield the keys ``k`` with ``lo <= k <= hi`` in ascending order."""
+        if self.key is None:
+            return
+        stack = []
+        current = self
+        while stack or current:
+            if current:
+                if current.key < lo:
+                    current = current.right  # the whole left subtree is below lo
+                else:
+                    stack.append(current)
+                    current = current.left
+            else:
+                current = stack.pop()
+                if current.key > hi:
+                    return
+                yield current.key
+                if current.count > 1:
+                    yield from repeat(current.key, current.count - 1)
+                current = current.right
 
+    # Wypisywanie: jedno sklejenie i jeden zapis zamiast print() dla każdego klucza
     def traverse_pre_order(self):
-        print(self.key, end=' ')
-        if self.left:
-            self.left.traverse_pre_order()
-        if self.right:
-            self.right.traverse_pre_order()
+        _write_keys(self.iter_pre_order())
 
     def traverse_in_order(self):
-        if self.left:
-            self.left.traverse_in_order()
-        print(self.key, end=' ')
-        if self.right:
-            self.right.traverse_in_order()
+        _write_keys(self.iter_in_order())
 
     def traverse_post_order(self):
-        if self.left:
-            self.left.traverse_post_order()
-        if self.right:
-            self.right.traverse_post_order()
-        print(self.key, end=' ')
-            
+        _write_keys(self.iter_post_order())
+
     def delete_tree(self):
-        if self.left:
-            self.left.delete_tree()
-            self.left = None
-        if self.right:
-            self.right.delete_tree()
-            self.right = None
+        stack = [self.left, self.right]
+        while stack:
+            node = stack.pop()
+            if node:
+                stack.append(node.left)
+                stack.append(node.right)
+                node.left = node.right = node.parent = None
+        self.left = None
+        self.right = None
         self.key = None
+        self.height = 1
+        if self.sized:
+            self.subtree_size = 1
+        self.__dict__.pop('count', None)
     
-    def convert_to_avl(self):
+    def convert_to_avl(self, in_place=False, multiset=False):
+        """Return a balanced copy of the tree, or rebalance these very nodes with ``in_place``."""
+        if in_place:
+            return dsw_rebalance(self)
+        node_class = sizedTreeNode if self.sized else binTreeNode
+        if multiset:
+            keys, counts = self.in_order_counts()
+            return bisection(keys, counts=counts, node_class=node_class)
+        return bisection(self.in_order_keys(morris=True), node_class=node_class)  # Klucze są już posortowane, więc od razu budujemy drzewo AVL
+
+    def in_order_keys(self, morris=False):
+        if morris:
+            return list(self.iter_in_order_morris())
         in_order_keys = []
+        stack = []
+        current = self
 
-        def in_order_traversal(node):
-            if node is None:
-                return
-            in_order_traversal(node.left)
-            in_order_keys.append(node.key)
-            in_order_traversal(node.right)
+        while stack or current:
+            if current:
+                stack.append(current)
+                current = current.left
+            else:
+                current = stack.pop()
+                in_order_keys.append(current.key)
+                if current.count > 1:
+                    in_order_keys.extend(repeat(current.key, current.count - 1))
+                current = current.right
 
-        in_order_traversal(self)
-        return makeAvlTree(in_order_keys)  # Użycie funkcji makeAvlTree do tworzenia nowego drzewa AVL
+        return in_order_keys
+
+    def in_order_counts(self):
+        """Distinct keys in order and their multiplicities, as two lists."""
+        keys = []
+        counts = []
+        if self.key is None:
+            return keys, counts
+        stack = []
+        current = self
+        while stack or current:
+            if current:
+                stack.append(current)
+                current = current.left
+            else:
+                current = stack.pop()
+                keys.append(current.key)
+                counts.append(current.count)
+                current = current.right
+        return keys, counts
 
 
     
     # AVL
     def update_height(self):
+        """Recompute height (and subtree size, if kept) from the children."""
         self.height = 1 + max(self.left.height if self.left else 0, self.right.height if self.right else 0)
+        if self.sized:
+            self.subtree_size = self.count + (self.left.subtree_size if self.left else 0) + (self.right.subtree_size if self.right else 0)
 
     def get_balance(self):
         return (self.left.height if self.left else 0) - (self.right.height if self.right else 0)
@@ -142,6 +361,7 @@ class binTreeNode:
             else:
                 y.parent.right = y
 
+        y.left = self
         self.parent = y
         self.update_height()
         y.update_height()
@@ -161,6 +381,7 @@ class binTreeNode:
             else:
                 x.parent.right = x
 
+        x.right = self
         self.parent = x
         self.update_height()
         x.update_height()
@@ -170,9 +391,60 @@ class binTreeNode:
     def size(self):
         if self.key is None:
             return 0
-        left_size = self.left.size() if self.left else 0
-        right_size = self.right.size() if self.right else 0
-        return 1 + left_size + right_size
+        if self.sized:
+            return self.subtree_size
+        return sum(self.in_order_counts()[1])
+
+    # Statystyki pozycyjne: O(log n) z subtree_size, bez nich liniowy przegląd
+    def rank(self, value):
+        """Number of keys smaller than ``value`` (duplicates counted)."""
+        if not self.sized:
+            rank = 0
+            for key in self.iter_in_order():
+                if not value > key:
+                    break
+                rank += 1
+            return rank
+        rank = 0
+        node = self if self.key is not None else None
+        while node:
+            if value < node.key:
+                node = node.left
+            elif value > node.key:
+                rank += node.count + (node.left.subtree_size if node.left else 0)
+                node = node.right
+            else:
+                return rank + (node.left.subtree_size if node.left else 0)
+        return rank
+
+    def select(self, k):
+        """The ``k``-th smallest key, counting from 0."""
+        if not self.sized:
+            if k >= 0:
+                for key in islice(self.iter_in_order(), k, None):
+                    return key
+            raise IndexError(f"select index {k} out of range")
+        if not 0 <= k < self.size():
+            raise IndexError(f"select index {k} out of range")
+        node = self
+        while True:
+            left_size = node.left.subtree_size if node.left else 0
+            if k < left_size:
+                node = node.left
+            elif k < left_size + node.count:
+                return node.key
+            else:
+                k -= left_size + node.count
+                node = node.right
+
+    def count_range(self, lo, hi):
+        """Number of keys ``k`` with ``lo <= k <= hi``."""
+        if hi < lo:
+            return 0
+        if not self.sized:
+            return sum(1 for _ in self.iter_range(lo, hi))
+        node = self.search(hi)
+        return self.rank(hi) + (node.count if node else 0) - self.rank(lo)
 
     def rebalance(self):
         self.update_height()
@@ -194,48 +466,1266 @@ class binTreeNode:
         return self
 
     
-    def rebalance_from_node(self, node):
-        while node:
-            node.update_height()
-            balance = node.get_balance()
-            
-            if balance > 1:
-                if node.left and node.left.get_balance() >= 0:
-                    node = node.rotate_right()
-                elif node.left and node.left.get_balance() < 0:
-                    node.left = node.left.rotate_left()
-                    node = node.rotate_right()
-
-            elif balance < -1:
-                if node.right and node.right.get_balance() <= 0:
-                    node = node.rotate_left()
-                elif node.right and node.right.get_balance() > 0:
-                    node.right = node.right.rotate_right()
-                    node = node.rotate_left()
+    def rebalance_from_node(self, node, stop_early=True):
+        """Retrace heights from ``node`` towards the root and return the root.
 
+        Each node on the path is rebalanced with at most one single or double
+        rotation. With ``stop_early`` the walk ends as soon as a subtree keeps
+        its previous height, since nothing above it can change. Must be
+        called on the current root.
+        """
+        while True:
+            old_height = node.height
+            node = node.rebalance()
+            if node.parent is None:
+                return node
+            if stop_early and node.height == old_height:
+                return self  # no rotation reached the root
             node = node.parent  # Przejście do rodzica, aby kontynuować rebalansowanie w górę drzewa
 
+    def root(self):
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node
+
+
+class sizedTreeNode(binTreeNode):
+    """binTreeNode that also keeps ``subtree_size``, for O(log n) rank and select."""
+    sized = True
+
+
+def _recount_ancestors(node):
+    """Recompute the subtree sizes of ``node`` and everything above it."""
+    while node:
+        node.subtree_size = (node.count + (node.left.subtree_size if node.left else 0)
+                             + (node.right.subtree_size if node.right else 0))
+        node = node.parent
+
+
+def _morris_unthread(current):
+    """Continue a Morris walk from ``current`` without output, removing the remaining threads."""
+    while current:
+        if current.left is None:
+            current = current.right
+            continue
+        pred = current.left
+        while pred.right and pred.right is not current:
+            pred = pred.right
+        if pred.right is None:
+            pred.right = current
+            current = current.left
+        else:
+            pred.right = None
+            current = current.right
+
+
+def _write_keys(keys):
+    sys.stdout.write(''.join(f'{key} ' for key in keys))
 
-def bisection(l, parentNode=None):
-    if not l:
+
+def bisection(l, parentNode=None, lo=0, hi=None, counts=None, tree_type='avl', node_class=binTreeNode):
+    """Build a balanced subtree from the sorted range ``l[lo:hi]`` without copying it.
+
+    ``counts``, if given, holds the multiplicity of every key in ``l``.
+    """
+    if hi is None:
+        hi = len(l)
+    if lo >= hi:
         return None
 
-    medianIdx = (len(l) - 1) // 2
-    med = l[medianIdx]
-    node = binTreeNode(key=med, parent=parentNode, tree_type='avl')
+    medianIdx = (lo + hi - 1) // 2
+    node = node_class(key=l[medianIdx], parent=parentNode, tree_type=tree_type)
+    if counts is not None and counts[medianIdx] != 1:
+        node.count = counts[medianIdx]
+        if node.sized:
+            node.subtree_size = node.count
+    if hi - lo < 2:
+        return node
+
+    node.left = bisection(l, node, lo, medianIdx, counts, tree_type, node_class)
+    node.right = bisection(l, node, medianIdx + 1, hi, counts, tree_type, node_class)
+
+    # Both halves differ in size by at most one, so the node is balanced by
+    # construction and only its height needs filling in.
+    node.update_height()
+    return node
+
+
+def dsw_rebalance(root):
+    """Rebalance the tree under ``root`` in place (Day-Stout-Warren); return the new root.
+
+    The existing nodes are first rotated into a right-leaning vine and then
+    compressed back into a complete tree, using O(1) extra memory.
+    """
+    if root is None or root.key is None:
+        return root
+
+    pseudo = binTreeNode()
+    pseudo.right = root
+    root.parent = pseudo
+
+    # Tree to vine.
+    n = 0
+    tail = pseudo
+    rest = root
+    while rest:
+        if rest.left is None:
+            n += 1
+            tail = rest
+            rest = rest.right
+        else:
+            child = rest.left
+            rest.left = child.right
+            if child.right:
+                child.right.parent = rest
+            child.right = rest
+            rest.parent = child
+            tail.right = child
+            child.parent = tail
+            rest = child
+
+    # Vine to tree.
+    full = 1
+    while full * 2 <= n + 1:
+        full *= 2
+    _dsw_compress(pseudo, n + 1 - full)
+    m = full - 1
+    while m > 1:
+        m //= 2
+        _dsw_compress(pseudo, m)
+
+    root = pseudo.right
+    root.parent = None
+    pseudo.right = None
+    _fix_heights(root, tree_type='avl')
+    return root
+
+
+def _dsw_compress(pseudo, count):
+    scanner = pseudo
+    for _ in range(count):
+        child = scanner.right
+        scanner.right = child.right
+        scanner.right.parent = scanner
+        scanner = scanner.right
+        child.right = scanner.left
+        if child.right:
+            child.right.parent = child
+        scanner.left = child
+        child.parent = scanner
+
+
+def _fix_heights(root, tree_type=None):
+    """Recompute every height (and subtree size) bottom-up by following parent pointers (no stack)."""
+    prev = None
+    node = root
+    while node:
+        if prev is node.parent:
+            if tree_type:
+                node.tree_type = tree_type
+            if node.left:
+                prev, node = node, node.left
+                continue
+            if node.right:
+                prev, node = node, node.right
+                continue
+        elif prev is node.left and node.right:
+            prev, node = node, node.right
+            continue
+        node.update_height()
+        if node is root:
+            break
+        prev, node = node, node.parent
+
+
+def _sorted_keys(l):
+    """Return the distinct keys of ``l`` as a sorted list, leaving the caller's data untouched.
+
+    Already-sorted, duplicate-free lists are used as they are. NumPy arrays
+    are sorted and deduplicated by NumPy and converted to Python ints in one go.
+    """
+    if hasattr(l, 'dtype'):
+        if len(l) > 1 and not (l[1:] > l[:-1]).all():
+            l = l.copy()
+            l.sort()
+            return l[:1].tolist() + l[1:][l[1:] != l[:-1]].tolist()
+        return l.tolist()
+    if not isinstance(l, list):
+        l = list(l)
+    if all(a < b for a, b in zip(l, islice(l, 1, None))):
+        return l
+    return [key for key, _ in groupby(sorted(l))]
+
+
+def _sorted_counts(l):
+    """Run-length encode the sorted keys of ``l``: the distinct keys and how often each occurs."""
+    if hasattr(l, 'dtype'):
+        l = l.copy()
+        l.sort()
+        if len(l) == 0:
+            return [], []
+        starts = [0] + ((l[1:] != l[:-1]).nonzero()[0] + 1).tolist()
+        ends = starts[1:] + [len(l)]
+        return l[starts].tolist(), [end - start for start, end in zip(starts, ends)]
+    keys = []
+    counts = []
+    for key, group in groupby(sorted(l)):
+        keys.append(key)
+        counts.append(sum(1 for _ in group))
+    return keys, counts
+
+
+def makeAvlTree(l, multiset=False):
+    if multiset:
+        keys, counts = _sorted_counts(l)
+        return bisection(keys, counts=counts)
+    return bisection(_sorted_keys(l))
+
+
+def _merge_union(a, b):
+    """Merge two sorted, duplicate-free lists into one."""
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            out.append(a[i])
+            i += 1
+        elif b[j] < a[i]:
+            out.append(b[j])
+            j += 1
+        else:
+            out.append(a[i])
+            i += 1
+            j += 1
+    out.extend(a[i:])
+    out.extend(b[j:])
+    return out
+
+
+def _merge_difference(a, b):
+    """Keys of sorted list ``a`` that are not in sorted list ``b``."""
+    out = []
+    j = 0
+    for key in a:
+        while j < len(b) and b[j] < key:
+            j += 1
+        if j == len(b) or b[j] != key:
+            out.append(key)
+    return out
+
+
+def _rebuild_is_cheaper(tree_size, batch_size):
+    # Per-key updates cost about batch_size * log2(n); a merge and bulk load
+    # costs about n + batch_size.
+    return batch_size * max(1, tree_size.bit_length()) >= tree_size + batch_size
+
+
+def _merge_intersection(a, b):
+    """Keys present in both sorted lists."""
+    out = []
+    j = 0
+    for key in a:
+        while j < len(b) and b[j] < key:
+            j += 1
+        if j < len(b) and b[j] == key:
+            out.append(key)
+    return out
+
+
+# Join-based AVL algorithms. They work on detached roots (parent is None)
+# and reuse the nodes they are given, so the input trees are consumed.
+
+def _height(node):
+    return node.height if node else 0
+
+
+def _detach(node):
+    """Cut ``node`` loose from its children; return ``(left, right)``."""
+    left, right = node.left, node.right
+    if left:
+        left.parent = None
+    if right:
+        right.parent = None
+    node.left = node.right = node.parent = None
+    node.height = 1
+    if node.sized:
+        node.subtree_size = node.count
+    node.tree_type = 'avl'
+    return left, right
+
+
+def _link(left, mid, right):
+    mid.left = left
+    mid.right = right
+    if left:
+        left.parent = mid
+    if right:
+        right.parent = mid
+    mid.update_height()
+    return mid
+
+
+def _join_node(left, mid, right):
+    """Join ``left`` < ``mid`` < ``right`` into one AVL tree in O(|h(left) - h(right)|)."""
+    hl, hr = _height(left), _height(right)
+    if abs(hl - hr) <= 1:
+        return _link(left, mid, right)
+
+    if hl > hr:
+        # Walk down the right spine of the taller tree to a subtree of
+        # matching height, hang the joined part there and retrace. Every
+        # spine node above the attachment point grows by mid + right.
+        added = mid.count + (right.subtree_size if right else 0) if mid.sized else 0
+        parent, c = None, left
+        while c is not None and c.height > hr + 1:
+            if added:
+                c.subtree_size += added
+            parent, c = c, c.right
+        parent.right = _link(c, mid, right)
+        mid.parent = parent
+        return left.rebalance_from_node(parent)
+
+    added = mid.count + (left.subtree_size if left else 0) if mid.sized else 0
+    parent, c = None, right
+    while c is not None and c.height > hl + 1:
+        if added:
+            c.subtree_size += added
+        parent, c = c, c.left
+    parent.left = _link(left, mid, c)
+    mid.parent = parent
+    return right.rebalance_from_node(parent)
+
+
+def join(left, key, right):
+    """Join two AVL trees whose keys are all below / above ``key``."""
+    node_class = type(left) if left else type(right) if right else binTreeNode
+    return _join_node(left, node_class(key=key, tree_type='avl'), right)
+
+
+def _pop_min(root):
+    """Detach the smallest node of ``root``; return ``(new_root, node)``."""
+    node = root
+    while node.left:
+        node = node.left
+    ancestor = node.parent
+    while node.sized and ancestor:
+        ancestor.subtree_size -= node.count
+        ancestor = ancestor.parent
+    parent, child = node.parent, node.right
+    node.right = None
+    if child:
+        child.parent = parent
+    if parent is None:
+        root = child
+    else:
+        parent.left = child
+        root = root.rebalance_from_node(parent)
+    _detach(node)
+    return root, node
+
+
+def join2(left, right):
+    """Join two AVL trees where every key of ``left`` is below every key of ``right``."""
+    if right is None:
+        return left
+    if left is None:
+        return right
+    right, mid = _pop_min(right)
+    return _join_node(left, mid, right)
+
+
+def split(root, key):
+    """Split an AVL tree around ``key``; return ``(left, node, right)``.
+
+    ``node`` is the detached node holding ``key``, or None if it is absent.
+    """
+    path = []
+    found = None
+    node = root
+    while node:
+        if key < node.key:
+            path.append(node)
+            node = node.left
+        elif key > node.key:
+            path.append(node)
+            node = node.right
+        else:
+            found = node
+            break
+
+    if found:
+        left, right = _detach(found)
+    else:
+        left = right = None
+    # Rebuild both sides bottom-up; each ancestor contributes itself and its
+    # off-path subtree. The on-path child has already been consumed.
+    for node in reversed(path):
+        if key < node.key:
+            sub = node.right
+            node.right = None
+            if sub:
+                sub.parent = None
+            node.left = None
+            _detach(node)
+            right = _join_node(right, node, sub)
+        else:
+            sub = node.left
+            node.left = None
+            if sub:
+                sub.parent = None
+            node.right = None
+            _detach(node)
+            left = _join_node(sub, node, left)
+    return left, found, right
+
+
+def _union(a, b):
+    """Return ``(root, shared)`` for the union of ``a`` and ``b``; ``shared`` counts common keys."""
+    if a is None:
+        return b, 0
+    if b is None:
+        return a, 0
+    if a.left is None and a.right is None:
+        # A single key: hang it into b instead of splitting b around it.
+        leaf, _ = b._attach(a.key)
+        if leaf is None:
+            return b, 1
+        return b.rebalance_from_node(leaf.parent), 0
+    a_left, a_right = _detach(a)
+    b_left, found, b_right = split(b, a.key)
+    left, shared_left = _union(a_left, b_left)
+    right, shared_right = _union(a_right, b_right)
+    return _join_node(left, a, right), shared_left + shared_right + (found is not None)
+
+
+def _intersection(a, b):
+    """Return ``(root, size)`` for the keys present in both ``a`` and ``b``."""
+    if a is None or b is None:
+        return None, 0
+    a_left, a_right = _detach(a)
+    b_left, found, b_right = split(b, a.key)
+    left, size_left = _intersection(a_left, b_left)
+    right, size_right = _intersection(a_right, b_right)
+    if found:
+        return _join_node(left, a, right), size_left + size_right + 1
+    return join2(left, right), size_left + size_right
+
+
+def _difference(a, b):
+    """Return ``(root, removed)`` for the keys of ``a`` not in ``b``."""
+    if a is None:
+        return None, 0
+    if b is None:
+        return a, 0
+    if b.left is None and b.right is None:
+        # A single key: unlink it from a instead of splitting a around it.
+        node = a.search(b.key)
+        if node is None:
+            return a, 0
+        a = a._remove(node)
+        return (a if a.key is not None else None), 1
+    b_left, b_right = _detach(b)
+    a_left, found, a_right = split(a, b.key)
+    left, removed_left = _difference(a_left, b_left)
+    right, removed_right = _difference(a_right, b_right)
+    return join2(left, right), removed_left + removed_right + (found is not None)
+
+
+PARALLEL_THRESHOLD = 200000  # keys in the smaller input
+
+_MERGE_OPERATIONS = {
+    'union': _merge_union,
+    'intersection': _merge_intersection,
+    'difference': _merge_difference,
+}
+
+
+def _merge_chunk(job):
+    operation, a, b = job
+    return _MERGE_OPERATIONS[operation](a, b)
+
+
+def _parallel_set_operation(operation, a_keys, b_keys, workers):
+    """Run a set operation on sorted key lists split into independent key ranges."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    step = max(1, len(a_keys) // workers)
+    pivots = a_keys[step::step][:workers - 1]
+    jobs = []
+    a_lo = b_lo = 0
+    for pivot in pivots + [None]:
+        a_hi = len(a_keys) if pivot is None else bisect_left(a_keys, pivot)
+        b_hi = len(b_keys) if pivot is None else bisect_left(b_keys, pivot)
+        jobs.append((operation, a_keys[a_lo:a_hi], b_keys[b_lo:b_hi]))
+        a_lo, b_lo = a_hi, b_hi
+
+    keys = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(_merge_chunk, jobs):
+            keys.extend(chunk)
+    return keys
+
+
+class TreeStats:
+    """Work counters filled in by BinaryTree.counting().
+
+    ``comparisons`` counts comparisons of a searched, ranked or inserted
+    value with node keys, including the min/max append checks, the finger
+    climb and splaying searches; ``visits`` counts the nodes whose keys
+    those comparisons read, a node compared twice in a row once. Batch
+    and set operations (``*_many``, split/join) compare keys among
+    themselves and are not counted. ``rotations`` counts every
+    rotate_left/rotate_right call, while ``single_rotations`` and
+    ``double_rotations`` count the AVL rebalancing cases that used them.
+    """
+    FIELDS = ('comparisons', 'visits', 'rotations', 'single_rotations', 'double_rotations',
+              'height_updates', 'allocations')
 
-    if len(l) < 2:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return "TreeStats(" + ", ".join(f"{field}={value}" for field, value in self.as_dict().items()) + ")"
+
+
+class _CountedKey:
+    """Stands in for the probed value so every comparison against a node key is counted."""
+    __slots__ = ('value', 'stats', 'last')
+    __hash__ = None
+
+    def __init__(self, value, stats):
+        self.value = value
+        self.stats = stats
+        self.last = None  # key of the node compared last
+
+    def _compared(self, key):
+        self.stats.comparisons += 1
+        if key is not self.last:  # distinct nodes hold distinct keys
+            self.last = key
+            self.stats.visits += 1
+
+    def __lt__(self, key):
+        self._compared(key)
+        return self.value < key
+
+    def __gt__(self, key):
+        self._compared(key)
+        return self.value > key
+
+    def __le__(self, key):
+        self._compared(key)
+        return self.value <= key
+
+    def __ge__(self, key):
+        self._compared(key)
+        return self.value >= key
+
+    def __eq__(self, key):
+        self._compared(key)
+        return self.value == key
+
+
+_probes = []  # (container class, method name) wrapped by _counting
+
+
+def counts_probes(*names):
+    """Class decorator: count the comparisons that these methods of a tree
+    container make between their value argument and node keys.
+    """
+    def decorator(cls):
+        _probes.extend((cls, name) for name in names)
+        return cls
+    return decorator
+
+
+_counting_stats = None
+_uncounted = {}  # original binTreeNode methods while counting is on
+
+
+def _counted_methods(stats):
+    original = dict(_uncounted)
+
+    def counted(value):
+        return value if isinstance(value, _CountedKey) else _CountedKey(value, stats)
+
+    def __init__(self, *args, **kwargs):
+        stats.allocations += 1
+        original['__init__'](self, *args, **kwargs)
+        if isinstance(self.key, _CountedKey):  # a new node for the probed value
+            self.key = self.key.value
+
+    def _attach(self, value, multiset=False):
+        return original['_attach'](self, counted(value), multiset)
+
+    def search(self, value):
+        return original['search'](self, counted(value))
+
+    def rank(self, value):
+        return original['rank'](self, counted(value))
+
+    def update_height(self):
+        stats.height_updates += 1
+        original['update_height'](self)
+
+    def rotate_left(self):
+        stats.rotations += 1
+        return original['rotate_left'](self)
+
+    def rotate_right(self):
+        stats.rotations += 1
+        return original['rotate_right'](self)
+
+    def rebalance(self):
+        before = stats.rotations
+        node = original['rebalance'](self)
+        rotations = stats.rotations - before
+        if rotations == 1:
+            stats.single_rotations += 1
+        elif rotations == 2:
+            stats.double_rotations += 1
+        return node
+
+    return locals()
+
+
+def _counted_probe(method, stats):
+    def probe(self, value, *args, **kwargs):
+        if not isinstance(value, _CountedKey):
+            value = _CountedKey(value, stats)
+        return method(self, value, *args, **kwargs)
+    return probe
+
+
+@contextmanager
+def _counting(stats):
+    """Swap counting versions of the binTreeNode hot paths in for the ``with`` block.
+
+    The plain methods are restored afterwards, so counting costs nothing
+    while it is off.
+    """
+    global _counting_stats
+    if _counting_stats is not None:
+        raise RuntimeError("operation counting is already active")
+    names = ('__init__', '_attach', 'search', 'rank', 'update_height', 'rotate_left', 'rotate_right', 'rebalance')
+    _uncounted.update((name, binTreeNode.__dict__[name]) for name in names)
+    counted = _counted_methods(stats)
+    probes = [(cls, name, cls.__dict__[name]) for cls, name in _probes]
+    _counting_stats = stats
+    try:
+        for name in names:
+            setattr(binTreeNode, name, counted[name])
+        for cls, name, method in probes:
+            setattr(cls, name, _counted_probe(method, stats))
+        yield stats
+    finally:
+        for name in names:
+            setattr(binTreeNode, name, _uncounted[name])
+        for cls, name, method in probes:
+            setattr(cls, name, method)
+        _uncounted.clear()
+        _counting_stats = None
+
+
+@counts_probes('insert', 'search')
+class BinaryTree:
+    """Owner of a binTreeNode tree.
+
+    Keeps the current root, so rotations never leave the caller holding an
+    inner node, and caches the key count and height. With ``multiset`` equal
+    keys share one node that counts them, and sizes, ranks and traversals
+    include every copy.
+
+    With ``order_stats`` the nodes also keep their subtree sizes
+    (``sized_node_class``), so rank, select and count_range take O(log n);
+    every insert and delete then updates the sizes on its path to the root.
+    Without it those queries walk the keys in order.
+
+    Keys beyond the current minimum or maximum are hung straight under that
+    node without comparisons on the way down. With ``use_finger`` inserts
+    and searches also start from the last accessed node and climb only as
+    far as needed, so nearby keys cost O(log d) comparisons for a distance
+    d; for random access the climb is wasted, so it is off by default.
+    Without ``order_stats`` neither shortcut touches the path above the new
+    leaf: a sorted stream appends in amortized O(1), rebalancing included
+    (the scapegoat tree still measures the leaf's depth), and a finger
+    insert costs O(log d). With it the sizes up to the root are updated,
+    which makes every insert O(depth).
+    """
+    tree_type = 'bst'
+    node_class = binTreeNode
+    sized_node_class = sizedTreeNode
+    stats = None
+    multiset = False
+    order_stats = False
+    use_finger = False
+
+    def __init__(self, values=(), multiset=False, order_stats=False, use_finger=False):
+        self.root = None
+        self._size = 0
+        self._height = 0
+        # Rotations keep every node in the tree, so the fingers stay valid
+        # until a delete or a rebuild replaces or drops the nodes they name.
+        self._finger = self._min = self._max = None
+        self._sorted = None  # (keys, ranks) NumPy view for the *_many lookups
+        if multiset:
+            self.multiset = True
+        if order_stats:
+            self.order_stats = True
+            self.node_class = self.sized_node_class
+        if use_finger:
+            self.use_finger = True
+        self.insert_many(values)
+
+    def __len__(self):
+        return self._size
+
+    def counting(self):
+        """Count comparisons, visits, rotations, height updates and node
+        allocations made inside the ``with`` block into ``self.stats``.
+
+        Counts accumulate across blocks until ``self.stats.reset()``. The
+        counters hook into binTreeNode and the tree classes themselves, so
+        work on other trees in the same block is counted too; outside the
+        block nothing is added to the hot paths.
+        """
+        if self.stats is None:
+            self.stats = TreeStats()
+        return _counting(self.stats)
+
+    def __contains__(self, value):
+        return self.search(value) is not None
+
+    def size(self):
+        return self._size
+
+    def height(self):
+        if self._height is None:
+            self._height = _subtree_height(self.root)
+        return self._height
+
+    def insert(self, value):
+        """Insert ``value``; return False if it was already present (never for a multiset)."""
+        if self.root is None:
+            self._sorted = None
+            self.root = self.node_class(key=value, tree_type=self.tree_type)
+            self._size = 1
+            self._height = 1
+            self._finger = self._min = self._max = self.root
+            return True
+
+        if self._max is None:
+            self._min, self._max = _leftmost(self.root), _rightmost(self.root)
+        if value > self._max.key:
+            leaf, depth = _hang_leaf(self._max, value, right=True)
+            self._max = leaf
+        elif value < self._min.key:
+            leaf, depth = _hang_leaf(self._min, value, right=False)
+            self._min = leaf
+        elif self.use_finger:
+            start = self._finger_start(value)
+            leaf, depth = start._attach(value, self.multiset)
+            if self.order_stats:
+                depth += _bump_ancestors(start)
+            else:
+                depth = None  # how far start is from the root is not known
+            if leaf is not None:
+                self._finger = leaf
+        else:
+            leaf, depth = self.root._attach(value, self.multiset)
+        if leaf is None:
+            if self.multiset:
+                self._size += 1
+                self._sorted = None
+                return True
+            return False
+        self._size += 1
+        self._sorted = None
+        self._inserted(leaf, depth)
+        return True
+
+    def _finger_start(self, value):
+        """The lowest node on the finger's path to the root whose subtree can hold ``value``."""
+        node = self._finger
+        if node is None:
+            return self.root
+        if value > node.key:
+            while node.parent is not None:
+                parent = node.parent
+                if node is parent.left and value <= parent.key:
+                    return parent if value == parent.key else node
+                node = parent
+        elif value < node.key:
+            while node.parent is not None:
+                parent = node.parent
+                if node is parent.right and value >= parent.key:
+                    return parent if value == parent.key else node
+                node = parent
         return node
 
-    node.left = bisection(l[:medianIdx], node)
-    node.right = bisection(l[medianIdx+1:], node)
+    def _forget_fingers(self, node):
+        """Drop fingers that deleting ``node`` could leave on a detached node."""
+        self._finger = None
+        if node.left and node.right:
+            # The successor's key moves into node; it is the maximum only
+            # if it is node's right child with nothing below.
+            if node.right is self._max and self._max.left is None:
+                self._max = None
+        elif node.parent is None:
+            # A root with one child may take over the child's key.
+            self._min = self._max = None
+        if node is self._min or node is self._max:
+            self._min = self._max = None
+
+    def insert_many(self, values):
+        """Insert every value in order; return how many were new.
+
+        The shape of a plain BST depends on insertion order, so the batch is
+        not reordered here.
+        """
+        inserted = 0
+        for value in values:
+            inserted += self.insert(value)
+        return inserted
+
+    def delete_many(self, values):
+        """Delete every value; return how many were present.
+
+        The batch is sorted and the tree walked once: a subtree is entered
+        only with the part of the batch inside its key range, so keys on a
+        shared path share the walk instead of each searching from the root.
+        The nodes found are unlinked children first, so a successor moved up
+        by an unlink is never one that is still to be deleted.
+        """
+        if self.root is None:
+            return 0
+        if self.multiset:
+            keys, counts = _sorted_counts(values)
+        else:
+            keys, counts = _sorted_keys(values), None
+        found = []  # (node, copies to delete), every node after its ancestors
+        stack = [(self.root, 0, len(keys))]
+        while stack:
+            node, lo, hi = stack.pop()
+            i = bisect_left(keys, node.key, lo, hi)
+            hit = i < hi and keys[i] == node.key
+            if hit:
+                found.append((node, counts[i] if counts else 1))
+            if node.left is not None and lo < i:
+                stack.append((node.left, lo, i))
+            if node.right is not None and i + hit < hi:
+                stack.append((node.right, i + hit, hi))
+        deleted = 0
+        for node, copies in reversed(found):
+            deleted += self._delete_node(node, copies)
+        return deleted
+
+    def _delete_each(self, values):
+        deleted = 0
+        for value in values:
+            deleted += self.delete(value)
+        return deleted
+
+    def _inserted(self, leaf, depth):
+        """Restore balance after ``leaf`` was hung at ``depth`` (None when not tracked)."""
+        if depth is None:
+            self._height = None
+        elif self._height is not None and depth > self._height:
+            self._height = depth
+
+    def delete(self, value):
+        """Remove ``value`` (one copy of it in a multiset); return False if it was not present."""
+        node = self.search(value)
+        if node is None:
+            return False
+        self._delete_node(node)
+        return True
 
-    node.update_height()  
-    node = node.rebalance()
+    def _delete_node(self, node, copies=1):
+        """Delete up to ``copies`` copies of the key in ``node``; return how many went."""
+        self._sorted = None
+        if node.count > copies:
+            node.count -= copies
+            while self.order_stats and node:
+                node.subtree_size -= copies
+                node = node.parent
+            self._size -= copies
+            return copies
+        copies = node.count
+        self._forget_fingers(node)
+        self._unlink(node)
+        self._size -= copies
+        self._deleted()
+        return copies
+
+    def _unlink(self, node):
+        """Take ``node`` out of the tree; subclasses restore their balance here."""
+        self.root = self.root._remove(node)
+        if self.root.key is None:
+            self.root = None
+
+    def _deleted(self):
+        self._height = None  # recomputed lazily by height()
+
+    def search(self, value):
+        if self.root is None:
+            return None
+        if not self.use_finger:
+            return self.root.search(value)
+        node = self._finger_start(value).search(value)
+        if node is not None:
+            self._finger = node
+        return node
+
+    def count(self, value):
+        """How many times ``value`` is in the tree."""
+        node = self.search(value)
+        return node.count if node else 0
+
+    # Zapytania wsadowe na tablicach NumPy
+    def _sorted_view(self):
+        """Sorted distinct keys as a NumPy array, and how many keys precede each of them.
+
+        Built with one in-order pass and kept until the tree changes.
+        """
+        if self._sorted is None:
+            import numpy as np
+            keys, counts = self.root.in_order_counts() if self.root else ([], [])
+            ranks = np.zeros(len(keys) + 1, dtype=np.int64)
+            np.cumsum(counts, out=ranks[1:])
+            self._sorted = (np.array(keys), ranks)
+        return self._sorted
+
+    def search_many(self, keys):
+        """Vectorised search: for every entry of ``keys`` its index among the
+        tree's sorted distinct keys, or -1 where it is absent.
+        """
+        import numpy as np
+        sorted_keys, _ = self._sorted_view()
+        keys = np.asarray(keys)
+        index = np.searchsorted(sorted_keys, keys)
+        found = index < len(sorted_keys)
+        found[found] = sorted_keys[index[found]] == keys[found]
+        return np.where(found, index, -1)
+
+    def contains_many(self, keys):
+        """Boolean mask of the entries of ``keys`` present in the tree."""
+        return self.search_many(keys) >= 0
+
+    def rank_many(self, keys):
+        """rank() of every entry of ``keys``, as a NumPy array."""
+        import numpy as np
+        sorted_keys, ranks = self._sorted_view()
+        return ranks[np.searchsorted(sorted_keys, np.asarray(keys))]
+
+    def rank(self, value):
+        return self.root.rank(value) if self.root else 0
+
+    def select(self, k):
+        if self.root is None:
+            raise IndexError(f"select index {k} out of range")
+        return self.root.select(k)
+
+    def count_range(self, lo, hi):
+        return self.root.count_range(lo, hi) if self.root else 0
+
+    def findMin(self):
+        return self.root.findMin() if self.root else None
+
+    def findMax(self):
+        return self.root.findMax() if self.root else None
+
+    def __iter__(self):
+        return self.iter_in_order()
+
+    def iter_pre_order(self):
+        return self.root.iter_pre_order() if self.root else iter(())
+
+    def iter_in_order(self):
+        return self.root.iter_in_order() if self.root else iter(())
+
+    def iter_post_order(self):
+        return self.root.iter_post_order() if self.root else iter(())
+
+    def iter_in_order_morris(self):
+        return self.root.iter_in_order_morris() if self.root else iter(())
+
+    def iter_reverse(self):
+        return self.root.iter_reverse() if self.root else iter(())
+
+    def iter_range(self, lo, hi):
+        return self.root.iter_range(lo, hi) if self.root else iter(())
+
+    def traverse_pre_order(self):
+        if self.root:
+            self.root.traverse_pre_order()
+
+    def traverse_in_order(self):
+        if self.root:
+            self.root.traverse_in_order()
+
+    def traverse_post_order(self):
+        if self.root:
+            self.root.traverse_post_order()
+
+    def delete_tree(self):
+        if self.root:
+            self.root.delete_tree()
+        self.root = None
+        self._size = 0
+        self._height = 0
+        self._sorted = None
+        self._finger = self._min = self._max = None
+
+    def convert_to_avl(self, in_place=False):
+        """Return an AVLTree with the same keys.
+
+        By default a new tree is bulk-loaded from the in-order keys. With
+        ``in_place`` the existing nodes are rebalanced and handed over to the
+        returned tree, which leaves this one empty.
+        """
+        tree = AVLTree(multiset=self.multiset, order_stats=self.order_stats, use_finger=self.use_finger)
+        if self.root:
+            tree.root = self.root.convert_to_avl(in_place, self.multiset)
+            tree._size = self._size
+        if in_place:
+            self.root = None
+            self._size = 0
+            self._height = 0
+            self._sorted = None
+            self._finger = self._min = self._max = None
+        return tree
+
+
+class AVLTree(BinaryTree):
+    tree_type = 'avl'
+
+    @classmethod
+    def from_keys(cls, l, multiset=False, order_stats=False, use_finger=False):
+        """Bulk-load a balanced tree from ``l`` (see makeAvlTree)."""
+        tree = cls(multiset=multiset, order_stats=order_stats, use_finger=use_finger)
+        if multiset:
+            tree._load(*_sorted_counts(l))
+        else:
+            tree._load(_sorted_keys(l))
+        return tree
+
+    def height(self):
+        return self.root.height if self.root else 0
+
+    def insert_many(self, values):
+        """Insert a batch of keys; return how many were new.
+
+        The batch is sorted, deduplicated and bulk-loaded into a small tree,
+        which is merged in by the split/join union, so each subtree the batch
+        touches is rebalanced once instead of once per key. Once that would
+        cost more than a linear pass, the tree's keys are merged with the
+        batch and bulk-loaded. A multiset is bulk-loaded only when empty and
+        otherwise updated key by key, since every copy counts.
+        """
+        if self.multiset:
+            if self.root is None:
+                self._load(*_sorted_counts(values))
+                return self._size
+            return BinaryTree.insert_many(self, values)
+        keys = _sorted_keys(values)
+        if not keys:
+            return 0
+        if self.root is None or _rebuild_is_cheaper(self._size, len(keys)):
+            old_size = self._size
+            merged = _merge_union(self.root.in_order_keys(), keys) if self.root else keys
+            self._load(merged)
+            return self._size - old_size
+        old_size = self._size
+        self.root, shared = _union(bisection(keys, node_class=self.node_class), self._take())
+        self._size = old_size + len(keys) - shared
+        return len(keys) - shared
+
+    def delete_many(self, values):
+        """Delete a batch of keys; return how many were present.
+
+        Small batches are bulk-loaded into a tree and taken out with the
+        split/join difference; large ones merge and rebuild, as in insert_many.
+        """
+        if self.multiset:
+            return self._delete_each(values)  # retracing rotates nodes the one-walk delete relies on
+        keys = _sorted_keys(values)
+        if not keys or self.root is None:
+            return 0
+        if _rebuild_is_cheaper(self._size, len(keys)):
+            old_size = self._size
+            self._load(_merge_difference(self.root.in_order_keys(), keys))
+            return old_size - self._size
+        old_size = self._size
+        self.root, removed = _difference(self._take(), bisection(keys))
+        self._size = old_size - removed
+        return removed
+
+    def _load(self, keys, counts=None):
+        self._sorted = None
+        self._finger = self._min = self._max = None
+        self.root = bisection(keys, counts=counts, node_class=self.node_class)
+        self._size = sum(counts) if counts is not None else len(keys)
+
+    def _empty(self):
+        """A new, empty AVLTree with this tree's options."""
+        return AVLTree(multiset=self.multiset, order_stats=self.order_stats, use_finger=self.use_finger)
+
+    def _take(self):
+        """Hand the nodes over to the caller and leave this tree empty."""
+        root = self.root
+        self.root = None
+        self._size = 0
+        self._sorted = None
+        self._finger = self._min = self._max = None
+        return root
+
+    def split(self, key):
+        """Split into ``(left, found, right)`` AVLTrees around ``key``; consumes this tree.
+
+        The split itself takes O(log n); without ``order_stats`` the left
+        side's keys are then counted to size both trees, which is O(n).
+        """
+        size = self._size
+        root_left, found, root_right = split(self._take(), key)
+        left = self._empty()
+        right = self._empty()
+        left.root, right.root = root_left, root_right
+        left._size = root_left.size() if root_left else 0
+        right._size = size - left._size - (found.count if found else 0)
+        return left, found is not None, right
+
+    def join(self, other):
+        """Append ``other``, whose keys must all be larger; consumes both trees."""
+        size = self._size + other._size
+        tree = self._empty()
+        if self.order_stats != other.order_stats:
+            # The nodes of both would mix sized and unsized classes.
+            tree._load(*self._take_counts(other))
+            return tree
+        tree.root = join2(self._take(), other._take())
+        tree._size = size
+        return tree
+
+    def _take_counts(self, other):
+        """Keys and counts of this tree followed by ``other``'s; empties both."""
+        keys, counts = self.root.in_order_counts() if self.root else ([], [])
+        other_keys, other_counts = other.root.in_order_counts() if other.root else ([], [])
+        self._take()
+        other._take()
+        return keys + other_keys, counts + other_counts
+
+    def union(self, other, workers=None):
+        """Return the union as a new AVLTree; consumes both trees.
+
+        With ``workers`` and both inputs large enough the key ranges are
+        merged in a process pool instead of by recursive split/join. A small
+        tree against a large one always uses split/join, which costs
+        O(m log(n/m + 1)) instead of flattening the large tree.
+        """
+        return self._set_operation('union', other, workers)
+
+    def intersection(self, other, workers=None):
+        return self._set_operation('intersection', other, workers)
+
+    def difference(self, other, workers=None):
+        return self._set_operation('difference', other, workers)
+
+    def _set_operation(self, operation, other, workers):
+        if self.multiset or other.multiset:
+            raise ValueError(f"{operation} is only defined for trees without duplicates")
+        tree = self._empty()
+        parallel = workers and workers > 1 and min(self._size, other._size) >= PARALLEL_THRESHOLD
+        if parallel or self.order_stats != other.order_stats:
+            # Sized and unsized nodes cannot share a tree, so mixed inputs
+            # are merged as key lists too.
+            a = self.root.in_order_keys() if self.root else []
+            b = other.root.in_order_keys() if other.root else []
+            self._take()
+            other._take()
+            if parallel:
+                tree._load(_parallel_set_operation(operation, a, b, workers))
+            else:
+                tree._load(_MERGE_OPERATIONS[operation](a, b))
+            return tree
+
+        size_a, size_b = self._size, other._size
+        a, b = self._take(), other._take()
+        if operation == 'union':
+            tree.root, shared = _union(a, b)
+            tree._size = size_a + size_b - shared
+        elif operation == 'intersection':
+            tree.root, tree._size = _intersection(a, b)
+        else:
+            tree.root, removed = _difference(a, b)
+            tree._size = size_a - removed
+        return tree
+
+    def _inserted(self, leaf, depth):
+        self.root = self.root.rebalance_from_node(leaf.parent)
+
+    def _deleted(self):
+        pass
+
+    def convert_to_avl(self, in_place=False):
+        return self
+
+
+def _leftmost(node):
+    while node.left is not None:
+        node = node.left
+    return node
+
+
+def _rightmost(node):
+    while node.right is not None:
+        node = node.right
     return node
 
 
+def _bump_ancestors(node):
+    """Count one more key in every proper ancestor of ``node``; return how many there are."""
+    depth = 0
+    node = node.parent
+    while node is not None:
+        node.subtree_size += 1
+        depth += 1
+        node = node.parent
+    return depth
+
+
+def _hang_leaf(parent, value, right):
+    """Attach ``value`` as a new leaf directly below ``parent``; return ``(leaf, depth)``.
+
+    Only sized nodes climb to the root, to count the new key; for the others
+    this is O(1) and the depth is returned as None.
+    """
+    leaf = type(parent)(key=value, parent=parent, tree_type=parent.tree_type)
+    if right:
+        parent.right = leaf
+    else:
+        parent.left = leaf
+    if not parent.sized:
+        return leaf, None
+    parent.subtree_size += 1
+    return leaf, 2 + _bump_ancestors(parent)
+
 
-def makeAvlTree(l):
-    l.sort()
-    return bisection(l)
+def _subtree_height(node):
+    height = 0
+    stack = [(node, 1)] if node else []
+    while stack:
+        node, depth = stack.pop()
+        height = max(height, depth)
+        if node.left:
+            stack.append((node.left, depth + 1))
+        if node.right:
+            stack.append((node.right, depth + 1))
+    return height
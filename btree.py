@@ -0,0 +1,312 @@
+from bisect import bisect_left, bisect_right
+
+from bst import AVLTree, _sorted_keys, _write_keys
+
+
+class _Node:
+    """B+-tree node: sorted ``keys`` plus ``children`` (None in a leaf).
+
+    Separator ``keys[i]`` of an inner node is <= every key under
+    ``children[i + 1]`` and > every key under ``children[i]``. Leaves are
+    chained through ``next`` in key order.
+    """
+    __slots__ = ('keys', 'children', 'next')
+
+    def __init__(self, keys=None, children=None):
+        self.keys = keys if keys is not None else []
+        self.children = children
+        self.next = None
+
+
+def _even_groups(n, most):
+    """Sizes of the fewest groups of at most ``most`` items covering ``n``, as equal as possible."""
+    groups = -(-n // most)
+    small, extra = divmod(n, groups)
+    return [small + 1] * extra + [small] * (groups - extra)
+
+
+class BTree:
+    """B+-tree of distinct keys with ``order`` children per inner node.
+
+    All keys live in the leaves, as contiguous sorted lists searched with
+    ``bisect``, so a lookup touches about log_order(n) nodes instead of
+    log2(n). In-order and range scans follow the leaf chain.
+    """
+    tree_type = 'btree'
+    multiset = False
+
+    def __init__(self, values=(), multiset=False, order=64):
+        if multiset:
+            raise ValueError("the B-tree backend keeps distinct keys only")
+        if order < 4:
+            raise ValueError("B-tree order must be at least 4")
+        self.order = order
+        self.max_keys = order - 1
+        self.min_keys = (order - 1) // 2
+        self.root = self.first = _Node()
+        self._size = 0
+        self.insert_many(values)
+
+    @classmethod
+    def from_keys(cls, l, multiset=False, order=64):
+        """Bulk-load from ``l`` in O(n) after sorting; duplicates collapse."""
+        tree = cls(multiset=multiset, order=order)
+        tree._load(_sorted_keys(l))
+        return tree
+
+    def _load(self, keys):
+        n = len(keys)
+        self._size = n
+        if n == 0:
+            self.root = self.first = _Node()
+            return
+        level = []
+        start = 0
+        for count in _even_groups(n, self.max_keys):
+            leaf = _Node(keys[start:start + count])
+            if level:
+                level[-1][1].next = leaf
+            level.append((keys[start], leaf))
+            start += count
+        self.first = level[0][1]
+        # Stack inner levels until one node is left; each entry is (smallest key below, node).
+        while len(level) > 1:
+            parents = []
+            start = 0
+            for count in _even_groups(len(level), self.order):
+                group = level[start:start + count]
+                node = _Node([low for low, _ in group[1:]], [child for _, child in group])
+                parents.append((group[0][0], node))
+                start += count
+            level = parents
+        self.root = level[0][1]
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, value):
+        return self.search(value) is not None
+
+    def __iter__(self):
+        return self.iter_in_order()
+
+    def size(self):
+        return self._size
+
+    def height(self):
+        """Number of levels, counting the leaves."""
+        height = 1
+        node = self.root
+        while node.children is not None:
+            node = node.children[0]
+            height += 1
+        return height
+
+    def _leaf_for(self, value, path=None):
+        node = self.root
+        while node.children is not None:
+            i = bisect_right(node.keys, value)
+            if path is not None:
+                path.append((node, i))
+            node = node.children[i]
+        return node
+
+    def search(self, value):
+        """Return ``(leaf, index)`` of ``value``, or None."""
+        leaf = self._leaf_for(value)
+        i = bisect_left(leaf.keys, value)
+        if i < len(leaf.keys) and leaf.keys[i] == value:
+            return leaf, i
+        return None
+
+    def insert(self, value):
+        """Insert ``value``; return False if it was already present."""
+        path = []
+        node = self._leaf_for(value, path)
+        keys = node.keys
+        i = bisect_left(keys, value)
+        if i < len(keys) and keys[i] == value:
+            return False
+        keys.insert(i, value)
+        self._size += 1
+
+        while len(node.keys) > self.max_keys:
+            separator, right = self._split(node)
+            if path:
+                parent, i = path.pop()
+                parent.keys.insert(i, separator)
+                parent.children.insert(i + 1, right)
+                node = parent
+            else:
+                self.root = _Node([separator], [node, right])
+                break
+        return True
+
+    def _split(self, node):
+        mid = len(node.keys) // 2
+        if node.children is None:
+            right = _Node(node.keys[mid:])
+            del node.keys[mid:]
+            right.next = node.next
+            node.next = right
+            return right.keys[0], right
+        separator = node.keys[mid]
+        right = _Node(node.keys[mid + 1:], node.children[mid + 1:])
+        del node.keys[mid:]
+        del node.children[mid + 1:]
+        return separator, right
+
+    def insert_many(self, values):
+        """Insert every value; an empty tree is bulk-loaded instead. Return how many were new."""
+        if self._size == 0:
+            self._load(_sorted_keys(values))
+            return self._size
+        inserted = 0
+        for value in values:
+            inserted += self.insert(value)
+        return inserted
+
+    def delete(self, value):
+        """Remove ``value``; return False if it was not present."""
+        path = []
+        node = self._leaf_for(value, path)
+        i = bisect_left(node.keys, value)
+        if i == len(node.keys) or node.keys[i] != value:
+            return False
+        del node.keys[i]
+        self._size -= 1
+
+        # Separators may now name deleted keys; they still route correctly.
+        while path and len(node.keys) < self.min_keys:
+            parent, i = path.pop()
+            self._fix_underflow(parent, i)
+            node = parent
+        if self.root.children is not None and not self.root.keys:
+            self.root = self.root.children[0]
+        return True
+
+    def _fix_underflow(self, parent, i):
+        """Refill ``parent.children[i]`` from a sibling, or merge it with one."""
+        node = parent.children[i]
+        left = parent.children[i - 1] if i > 0 else None
+        right = parent.children[i + 1] if i + 1 < len(parent.children) else None
+        leaf = node.children is None
+
+        if left is not None and len(left.keys) > self.min_keys:
+            if leaf:
+                node.keys.insert(0, left.keys.pop())
+                parent.keys[i - 1] = node.keys[0]
+            else:
+                node.keys.insert(0, parent.keys[i - 1])
+                parent.keys[i - 1] = left.keys.pop()
+                node.children.insert(0, left.children.pop())
+        elif right is not None and len(right.keys) > self.min_keys:
+            if leaf:
+                node.keys.append(right.keys.pop(0))
+                parent.keys[i] = right.keys[0]
+            else:
+                node.keys.append(parent.keys[i])
+                parent.keys[i] = right.keys.pop(0)
+                node.children.append(right.children.pop(0))
+        else:
+            if left is not None:
+                i -= 1
+                node, right = left, node
+            # Merge children[i + 1] into children[i].
+            if leaf:
+                node.keys.extend(right.keys)
+                node.next = right.next
+            else:
+                node.keys.append(parent.keys[i])
+                node.keys.extend(right.keys)
+                node.children.extend(right.children)
+            del parent.keys[i]
+            del parent.children[i + 1]
+
+    def delete_many(self, values):
+        """Delete every value; return how many were present."""
+        deleted = 0
+        for value in values:
+            deleted += self.delete(value)
+        return deleted
+
+    def findMin(self):
+        return self.first.keys[0] if self._size else None
+
+    def findMax(self):
+        if not self._size:
+            return None
+        node = self.root
+        while node.children is not None:
+            node = node.children[-1]
+        return node.keys[-1]
+
+    def iter_in_order(self):
+        leaf = self.first
+        while leaf is not None:
+            yield from leaf.keys
+            leaf = leaf.next
+
+    def iter_range(self, lo, hi):
+        """Yield the keys ``k`` with ``lo <= k <= hi`` in ascending order."""
+        leaf = self._leaf_for(lo)
+        i = bisect_left(leaf.keys, lo)
+        while leaf is not None:
+            keys = leaf.keys
+            end = bisect_right(keys, hi)
+            yield from keys[i:end]
+            if end < len(keys):
+                return
+            leaf, i = leaf.next, 0
+
+    def count_range(self, lo, hi):
+        return sum(1 for _ in self.iter_range(lo, hi)) if lo <= hi else 0
+
+    def iter_pre_order(self):
+        """Keys of every node, parents before children; inner nodes give their separators."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield from node.keys
+            if node.children is not None:
+                stack.extend(reversed(node.children))
+
+    def iter_post_order(self):
+        """Keys of every node, children before parents; inner nodes give their separators."""
+        stack = [(self.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done or node.children is None:
+                yield from node.keys
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+
+    def traverse_pre_order(self):
+        _write_keys(self.iter_pre_order())
+
+    def traverse_in_order(self):
+        _write_keys(self.iter_in_order())
+
+    def traverse_post_order(self):
+        _write_keys(self.iter_post_order())
+
+    def in_order_keys(self):
+        keys = []
+        leaf = self.first
+        while leaf is not None:
+            keys.extend(leaf.keys)
+            leaf = leaf.next
+        return keys
+
+    def delete_tree(self):
+        self.root = self.first = _Node()
+        self._size = 0
+
+    def convert_to_avl(self, in_place=False):
+        """Return an AVLTree with the same keys; with ``in_place`` this tree is emptied."""
+        tree = AVLTree()
+        tree._load(self.in_order_keys())
+        if in_place:
+            self.delete_tree()
+        return tree
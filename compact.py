@@ -0,0 +1,312 @@
+from array import array
+from itertools import groupby
+
+NIL = -1
+
+
+class CompactTree:
+    """BST/AVL tree stored in parallel typed arrays instead of node objects.
+
+    Node ``i`` is described by ``keys[i]``, ``left[i]``, ``right[i]``,
+    ``parent[i]`` and ``height[i]``; ``NIL`` marks a missing link.  Freed
+    slots are chained through ``right`` and reused by later inserts.
+    Keys must fit in a signed 64-bit integer.
+    """
+
+    def __init__(self, tree_type='bst'):
+        self.tree_type = tree_type
+        self.keys = array('q')
+        self.left = array('i')
+        self.right = array('i')
+        self.parent = array('i')
+        self.height = array('i')
+        self.root = NIL
+        self.free = NIL
+        self.count = 0
+
+    def _alloc(self, key, parent):
+        if self.free != NIL:
+            i = self.free
+            self.free = self.right[i]
+            self.keys[i] = key
+            self.left[i] = NIL
+            self.right[i] = NIL
+            self.parent[i] = parent
+            self.height[i] = 1
+        else:
+            i = len(self.keys)
+            self.keys.append(key)
+            self.left.append(NIL)
+            self.right.append(NIL)
+            self.parent.append(parent)
+            self.height.append(1)
+        self.count += 1
+        return i
+
+    def _release(self, i):
+        self.left[i] = NIL
+        self.parent[i] = NIL
+        self.right[i] = self.free
+        self.free = i
+        self.count -= 1
+
+    def insert(self, value):
+        if self.root == NIL:
+            self.root = self._alloc(value, NIL)
+            return True
+
+        keys, left, right = self.keys, self.left, self.right
+        current = self.root
+        while True:
+            key = keys[current]
+            if value < key:
+                if left[current] == NIL:
+                    left[current] = self._alloc(value, current)
+                    break
+                current = left[current]
+            elif value > key:
+                if right[current] == NIL:
+                    right[current] = self._alloc(value, current)
+                    break
+                current = right[current]
+            else:
+                return False
+
+        if self.tree_type == 'avl':
+            self._retrace(current, stop_early=True)
+        return True
+
+    def search(self, value):
+        keys, left, right = self.keys, self.left, self.right
+        current = self.root
+        while current != NIL:
+            key = keys[current]
+            if value < key:
+                current = left[current]
+            elif value > key:
+                current = right[current]
+            else:
+                return current
+        return None
+
+    def _replace_child(self, parent, old, new):
+        if parent == NIL:
+            self.root = new
+        elif self.left[parent] == old:
+            self.left[parent] = new
+        else:
+            self.right[parent] = new
+        if new != NIL:
+            self.parent[new] = parent
+
+    def delete(self, value):
+        node = self.search(value)
+        if node is None:
+            return False
+
+        left, right = self.left, self.right
+        if left[node] != NIL and right[node] != NIL:
+            successor = right[node]
+            while left[successor] != NIL:
+                successor = left[successor]
+            self.keys[node] = self.keys[successor]
+            node = successor
+
+        child = left[node] if left[node] != NIL else right[node]
+        parent = self.parent[node]
+        self._replace_child(parent, node, child)
+        self._release(node)
+
+        if self.tree_type == 'avl' and parent != NIL:
+            self._retrace(parent, stop_early=False)
+        return True
+
+    def findMin(self):
+        if self.root == NIL:
+            return None
+        left = self.left
+        current = self.root
+        while left[current] != NIL:
+            current = left[current]
+        return self.keys[current]
+
+    def findMax(self):
+        if self.root == NIL:
+            return None
+        right = self.right
+        current = self.root
+        while right[current] != NIL:
+            current = right[current]
+        return self.keys[current]
+
+    def in_order_keys(self):
+        keys, left, right = self.keys, self.left, self.right
+        output = []
+        stack = []
+        current = self.root
+        while stack or current != NIL:
+            if current != NIL:
+                stack.append(current)
+                current = left[current]
+            else:
+                current = stack.pop()
+                output.append(keys[current])
+                current = right[current]
+        return output
+
+    def pre_order_keys(self):
+        keys, left, right = self.keys, self.left, self.right
+        output = []
+        stack = [self.root] if self.root != NIL else []
+        while stack:
+            current = stack.pop()
+            output.append(keys[current])
+            if right[current] != NIL:
+                stack.append(right[current])
+            if left[current] != NIL:
+                stack.append(left[current])
+        return output
+
+    def post_order_keys(self):
+        keys, left, right = self.keys, self.left, self.right
+        output = []
+        stack = [self.root] if self.root != NIL else []
+        while stack:
+            current = stack.pop()
+            output.append(keys[current])
+            if left[current] != NIL:
+                stack.append(left[current])
+            if right[current] != NIL:
+                stack.append(right[current])
+        output.reverse()
+        return output
+
+    def traverse_pre_order(self):
+        print(*self.pre_order_keys(), end=' ')
+
+    def traverse_in_order(self):
+        print(*self.in_order_keys(), end=' ')
+
+    def traverse_post_order(self):
+        print(*self.post_order_keys(), end=' ')
+
+    def size(self):
+        return self.count
+
+    def delete_tree(self):
+        self.__init__(self.tree_type)
+
+    def convert_to_avl(self):
+        return makeCompactAvlTree(self.in_order_keys())
+
+    def nbytes(self):
+        """Bytes held by the backing arrays, including free slots."""
+        return sum(len(a) * a.itemsize for a in (self.keys, self.left, self.right, self.parent, self.height))
+
+    # AVL
+    def _h(self, i):
+        return self.height[i] if i != NIL else 0
+
+    def update_height(self, i):
+        self.height[i] = 1 + max(self._h(self.left[i]), self._h(self.right[i]))
+
+    def get_balance(self, i):
+        return self._h(self.left[i]) - self._h(self.right[i])
+
+    def rotate_left(self, x):
+        y = self.right[x]
+        b = self.left[y]
+        self.right[x] = b
+        if b != NIL:
+            self.parent[b] = x
+        self._replace_child(self.parent[x], x, y)
+        self.left[y] = x
+        self.parent[x] = y
+        self.update_height(x)
+        self.update_height(y)
+        return y
+
+    def rotate_right(self, x):
+        y = self.left[x]
+        b = self.right[y]
+        self.left[x] = b
+        if b != NIL:
+            self.parent[b] = x
+        self._replace_child(self.parent[x], x, y)
+        self.right[y] = x
+        self.parent[x] = y
+        self.update_height(x)
+        self.update_height(y)
+        return y
+
+    def rebalance(self, i):
+        balance = self.get_balance(i)
+        if balance > 1:
+            if self.get_balance(self.left[i]) < 0:
+                self.rotate_left(self.left[i])
+            return self.rotate_right(i)
+        if balance < -1:
+            if self.get_balance(self.right[i]) > 0:
+                self.rotate_right(self.right[i])
+            return self.rotate_left(i)
+        return i
+
+    def _retrace(self, node, stop_early):
+        while node != NIL:
+            old_height = self.height[node]
+            self.update_height(node)
+            node = self.rebalance(node)
+            if stop_early and self.height[node] == old_height:
+                break
+            node = self.parent[node]
+
+
+def _unique_sorted(l):
+    if hasattr(l, 'dtype'):
+        # NumPy input: sort, deduplicate and copy the raw int64 bytes without
+        # creating a Python int per key.
+        import numpy as np
+        keys = array('q')
+        keys.frombytes(np.unique(l).astype(np.int64).tobytes())
+        return keys
+    return array('q', [key for key, _ in groupby(sorted(l))])
+
+
+def makeCompactAvlTree(l):
+    """Build a balanced CompactTree from ``l`` in O(n) after sorting; duplicates collapse."""
+    keys = _unique_sorted(l)
+    tree = CompactTree(tree_type='avl')
+    n = len(keys)
+    if n == 0:
+        return tree
+
+    tree.keys = keys
+    tree.left = array('i', [NIL]) * n
+    tree.right = array('i', [NIL]) * n
+    tree.parent = array('i', [NIL]) * n
+    tree.height = array('i', [1]) * n
+    tree.count = n
+
+    # Slot ``mid`` of every range [lo, hi) holds the median of that range,
+    # so the sorted key array doubles as the node storage.
+    stack = [(0, n, NIL, 0)]
+    order = []
+    while stack:
+        lo, hi, parent, side = stack.pop()
+        if lo >= hi:
+            continue
+        mid = (lo + hi - 1) // 2
+        tree.parent[mid] = parent
+        if parent == NIL:
+            tree.root = mid
+        elif side < 0:
+            tree.left[parent] = mid
+        else:
+            tree.right[parent] = mid
+        order.append(mid)
+        stack.append((lo, mid, mid, -1))
+        stack.append((mid + 1, hi, mid, 1))
+
+    for i in reversed(order):
+        tree.update_height(i)
+    return tree
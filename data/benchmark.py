@@ -1,19 +1,37 @@
-import time
+import argparse
+import csv
+import multiprocessing
 import numpy as np
 import os
-from bst import binTreeNode, makeAvlTree
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bst import AVLTree, BinaryTree
+from compact import CompactTree, makeCompactAvlTree
+from ingest import load_dataset
+from backends import make_tree
+from harness import Timing, compare, measure, measure_memory, read_stats, write_stats
 
 def read_data(file_path):
-    return np.loadtxt(file_path, dtype=int)
+    return load_dataset(file_path)
 
 def create_bst(data):
-    tree = binTreeNode(tree_type='bst')
-    for num in data:
+    return BinaryTree(data.tolist())
+
+def create_avl(data):
+    return AVLTree.from_keys(data)
+
+def create_multiset_avl(data):
+    return AVLTree.from_keys(data, multiset=True)
+
+def create_compact_bst(data):
+    tree = CompactTree(tree_type='bst')
+    for num in data.tolist():
         tree.insert(num)
     return tree
 
-def create_avl(data):
-    return makeAvlTree(sorted(data))
+def create_compact_avl(data):
+    return makeCompactAvlTree(data)
 
 def find_min_max(tree):
     return tree.findMin(), tree.findMax()
@@ -21,7 +39,7 @@ def find_min_max(tree):
 def print_in_order(tree):
     output = []
     stack = []
-    current = tree
+    current = tree.root
 
     while stack or current:
         if current:
@@ -35,57 +53,443 @@ def print_in_order(tree):
     return output
 
 
+def print_in_order_morris(tree):
+    return list(tree.iter_in_order_morris())
+
+def select_by_traversal(tree, k):
+    return print_in_order(tree)[k]
+
+def count_range_by_traversal(tree, lo, hi):
+    return sum(1 for key in print_in_order(tree) if lo <= key <= hi)
+
 def rebalance_bst(tree):
     return tree.convert_to_avl()
 
-def measure_time(function, *args, runs=2):
-    """Measure the average execution time of a function over a specified number of runs."""
-    total_time = 0
-    for _ in range(runs):
-        start = time.perf_counter()
-        function(*args)
-        end = time.perf_counter()
-        total_time += (end - start)
-    return total_time / runs
+def rebalance_bst_in_place(tree):
+    return tree.convert_to_avl(in_place=True)
+
+def measure_dsw_rebalance(data):
+    """Time an in-place DSW rebalance, each run on a freshly built BST."""
+    return measure(rebalance_bst_in_place, setup=lambda: (create_bst(data),))
+
+def insert_each(tree, keys):
+    for key in keys:
+        tree.insert(key)
+
+def delete_each(tree, keys):
+    for key in keys:
+        tree.delete(key)
+
+def avl_update_latency(data, keys):
+    """Per-key time of inserting ``keys`` into an AVL tree of ``data`` and of deleting them again."""
+    def loaded_tree():
+        tree = create_avl(data)
+        insert_each(tree, keys)
+        return tree, keys
+    insert_latency = measure(insert_each, setup=lambda: (create_avl(data), keys), per=len(keys))
+    delete_latency = measure(delete_each, setup=loaded_tree, per=len(keys))
+    return insert_latency, delete_latency
+
+def insert_many(tree, keys):
+    tree.insert_many(keys)
+
+def delete_many(tree, keys):
+    tree.delete_many(keys)
+
+def measure_batch_update(data):
+    """Time insert_many/delete_many of every other key into an AVL tree holding the rest."""
+    kept, batch = data[::2], data[1::2]
+    insert_time = measure(insert_many, setup=lambda: (AVLTree.from_keys(kept), batch))
+    delete_time = measure(delete_many, setup=lambda: (AVLTree.from_keys(data), batch))
+    return insert_time, delete_time
+
+def tree_memory(tree):
+    """Approximate bytes held by an object-based tree (nodes and their __dict__)."""
+    total = 0
+    stack = [tree.root] if tree.root else []
+    while stack:
+        node = stack.pop()
+        total += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+        if node.left:
+            stack.append(node.left)
+        if node.right:
+            stack.append(node.right)
+    return total
+
+def tree_memory_btree(tree):
+    """Approximate bytes held by a BTree (nodes and their key/child lists)."""
+    total = 0
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        total += sys.getsizeof(node) + sys.getsizeof(node.keys)
+        if node.children is not None:
+            total += sys.getsizeof(node.children)
+            stack.extend(node.children)
+    return total
+
+def measure_time(function, *args):
+    """Time a function with the statistics harness; the CSVs report the median."""
+    return measure(function, *args)
+
+# Every operation rebuilds what it needs from the raw data, so a job can run
+# in any worker process and in any order. It returns {column: value}.
+def op_creation(data):
+    return {
+        'BST Creation': measure_time(create_bst, data),
+        'AVL Creation': measure_time(create_avl, data),
+    }
+
+def op_find_min_max(data):
+    return {
+        'BST Find Min/Max': measure_time(find_min_max, create_bst(data)),
+        'AVL Find Min/Max': measure_time(find_min_max, create_avl(data)),
+    }
+
+def op_in_order(data):
+    bst, avl = create_bst(data), create_avl(data)
+    return {
+        'BST In-Order': measure_time(print_in_order, bst),
+        'AVL In-Order': measure_time(print_in_order, avl),
+        'BST In-Order (Morris)': measure_time(print_in_order_morris, bst),
+        'AVL In-Order (Morris)': measure_time(print_in_order_morris, avl),
+    }
+
+def op_rebalance(data):
+    return {
+        'Rebalance BST': measure_time(rebalance_bst, create_bst(data)),
+        'Rebalance BST (DSW)': measure_dsw_rebalance(data),
+    }
+
+def op_compact(data):
+    return {
+        'Compact BST Creation': measure_time(create_compact_bst, data),
+        'Compact AVL Creation': measure_time(create_compact_avl, data),
+        'Compact AVL In-Order': measure_time(create_compact_avl(data).in_order_keys),
+    }
+
+def op_memory(data):
+    return {
+        'BST Memory': tree_memory(create_bst(data)),
+        'Compact BST Memory': create_compact_bst(data).nbytes(),
+    }
+
+def op_memory_profile(data):
+    bst, avl, compact_bst, compact_avl = create_bst(data), create_avl(data), create_compact_bst(data), create_compact_avl(data)
+    kept, batch = data[::2], data[1::2]
+    build_peak, build_blocks = measure_memory(create_avl, data)
+    convert_peak, convert_blocks = measure_memory(rebalance_bst, bst)
+    dsw_peak, dsw_blocks = measure_memory(rebalance_bst_in_place, setup=lambda: (create_bst(data),))
+    batch_peak, batch_blocks = measure_memory(insert_many, setup=lambda: (AVLTree.from_keys(kept), batch))
+    return {
+        'AVL Memory': tree_memory(avl),
+        'BST Bytes/Node': tree_memory(bst) / bst.size(),
+        'AVL Bytes/Node': tree_memory(avl) / avl.size(),
+        'Compact BST Bytes/Node': compact_bst.nbytes() / compact_bst.size(),
+        'Compact AVL Bytes/Node': compact_avl.nbytes() / compact_avl.size(),
+        'AVL Build Peak Memory': build_peak,
+        'AVL Build Live Blocks': build_blocks,
+        'Convert To AVL Peak Memory': convert_peak,
+        'Convert To AVL Live Blocks': convert_blocks,
+        'DSW Rebalance Peak Memory': dsw_peak,
+        'DSW Rebalance Live Blocks': dsw_blocks,
+        'AVL Insert Many Peak Memory': batch_peak,
+        'AVL Insert Many Live Blocks': batch_blocks,
+    }
+
+def op_counters(data):
+    """Work counters of building an AVL tree key by key, searching every key and deleting half."""
+    keys = data.tolist()
+    tree = AVLTree()
+    with tree.counting() as stats:
+        insert_each(tree, keys)
+    values = {f"AVL Insert {name.replace('_', ' ').title()}": count for name, count in stats.as_dict().items()}
+    stats.reset()
+    with tree.counting():
+        for key in keys:
+            tree.search(key)
+    values['AVL Search Comparisons'] = stats.comparisons
+    stats.reset()
+    with tree.counting():
+        delete_each(tree, keys[::2])
+    values['AVL Delete Rotations'] = stats.rotations
+    values['AVL Delete Height Updates'] = stats.height_updates
+    return values
+
+def op_multiset(data):
+    return {
+        'Multiset AVL Creation': measure_time(create_multiset_avl, data),
+        'Multiset AVL Memory': tree_memory(create_multiset_avl(data)),
+    }
 
-def benchmark(directory):
-    data_types = ['random', 'increasing', 'decreasing', 'a_shaped', 'constant']
-    sizes = range(10000, 100001, 10000)
+def search_each(tree, keys):
+    for key in keys:
+        tree.search(key)
 
+# Backends added next to BST/AVL, with their column label.
+BACKEND_LABELS = {'rb': 'Red-Black', 'treap': 'Treap', 'splay': 'Splay', 'scapegoat': 'Scapegoat'}
+
+def op_backends(data):
+    keys = data.tolist()
+    values = {}
+    for name, label in BACKEND_LABELS.items():
+        values[f'{label} Creation'] = measure_time(make_tree, name, data)
+        values[f'{label} Search'] = measure_time(search_each, make_tree(name, data), keys)
+    values['AVL Search'] = measure_time(search_each, create_avl(data), keys)
+    return values
+
+def range_scan(tree, lo, hi):
+    return list(tree.iter_range(lo, hi))
+
+def op_btree(data):
+    keys = data.tolist()
+    btree, avl = make_tree('btree', data), create_avl(data)
+    lo, hi = np.percentile(data, [25, 75]).astype(int).tolist()
+    return {
+        'B-Tree Creation': measure(insert_each, setup=lambda: (make_tree('btree'), keys)),
+        'B-Tree Bulk Load': measure_time(make_tree, 'btree', data),
+        'B-Tree Search': measure_time(search_each, btree, keys),
+        'B-Tree Range Scan': measure_time(range_scan, btree, lo, hi),
+        'AVL Range Scan': measure_time(range_scan, avl, lo, hi),
+        'B-Tree Memory': tree_memory_btree(btree),
+    }
+
+def finger_avl():
+    tree = AVLTree()
+    tree.use_finger = True
+    return tree
+
+def op_finger(data):
+    """Key-by-key AVL construction and search in data order, from the root and from the finger."""
+    keys = data.tolist()
+    tree = finger_avl()
+    insert_each(tree, keys)
+    return {
+        'AVL Insert Creation': measure(insert_each, setup=lambda: (AVLTree(), keys)),
+        'AVL Insert Creation (Finger)': measure(insert_each, setup=lambda: (finger_avl(), keys)),
+        'AVL Search (Finger)': measure_time(search_each, tree, keys),
+    }
+
+def contains_each(tree, keys):
+    return [key in tree for key in keys]
+
+def contains_many_cold(tree, keys):
+    tree._sorted = None  # include building the sorted-array view
+    return tree.contains_many(keys)
+
+def op_batch_lookup(data):
+    """Membership of every key plus as many misses: per-key loop against contains_many."""
+    tree = create_avl(data)
+    queries = np.concatenate((data, np.random.default_rng(len(data)).integers(0, 2 * int(data.max()) + 2, len(data))))
+    loop = measure_time(contains_each, tree, queries.tolist())
+    cold = measure_time(contains_many_cold, tree, queries)
+    warm = measure_time(tree.contains_many, queries)
+    return {
+        'AVL Contains Loop': loop,
+        'AVL Contains Many (Cold)': cold,
+        'AVL Contains Many': warm,
+        'AVL Contains Many Lookups/s': len(queries) / warm.median,
+    }
+
+def op_update_latency(data):
+    update_keys = (np.random.default_rng(len(data)).permutation(1000) + int(data.max()) + 1).tolist()
+    insert_latency, delete_latency = avl_update_latency(data, update_keys)
+    return {'AVL Insert Latency': insert_latency, 'AVL Delete Latency': delete_latency}
+
+def op_batch_update(data):
+    insert_time, delete_time = measure_batch_update(data)
+    return {'AVL Insert Many': insert_time, 'AVL Delete Many': delete_time}
+
+def op_order_statistics(data):
+    avl = AVLTree.from_keys(data, order_stats=True)
+    k = avl.size() // 2
+    lo, hi = np.percentile(data, [25, 75]).astype(int).tolist()
+    return {
+        'AVL Select (Traversal)': measure_time(select_by_traversal, avl, k),
+        'AVL Select': measure_time(avl.select, k),
+        'AVL Count Range (Traversal)': measure_time(count_range_by_traversal, avl, lo, hi),
+        'AVL Count Range': measure_time(avl.count_range, lo, hi),
+    }
+
+OPERATIONS = {
+    'creation': op_creation,
+    'find_min_max': op_find_min_max,
+    'in_order': op_in_order,
+    'rebalance': op_rebalance,
+    'compact': op_compact,
+    'memory': op_memory,
+    'memory_profile': op_memory_profile,
+    'counters': op_counters,
+    'multiset': op_multiset,
+    'backends': op_backends,
+    'btree': op_btree,
+    'finger': op_finger,
+    'batch_lookup': op_batch_lookup,
+    'update_latency': op_update_latency,
+    'batch_update': op_batch_update,
+    'order_statistics': op_order_statistics,
+}
+
+# CSV column order (after Size); new columns are only ever appended.
+COLUMNS = [
+    'BST Creation', 'AVL Creation', 'BST Find Min/Max', 'AVL Find Min/Max',
+    'BST In-Order', 'AVL In-Order', 'Rebalance BST',
+    'Compact BST Creation', 'Compact AVL Creation', 'Compact AVL In-Order',
+    'BST Memory', 'Compact BST Memory',
+    'AVL Insert Latency', 'AVL Delete Latency',
+    'Rebalance BST (DSW)',
+    'AVL Insert Many', 'AVL Delete Many',
+    'AVL Select (Traversal)', 'AVL Select', 'AVL Count Range (Traversal)', 'AVL Count Range',
+    'BST In-Order (Morris)', 'AVL In-Order (Morris)',
+    'AVL Memory', 'BST Bytes/Node', 'AVL Bytes/Node', 'Compact BST Bytes/Node', 'Compact AVL Bytes/Node',
+    'AVL Build Peak Memory', 'AVL Build Live Blocks', 'Convert To AVL Peak Memory', 'Convert To AVL Live Blocks',
+    'DSW Rebalance Peak Memory', 'DSW Rebalance Live Blocks', 'AVL Insert Many Peak Memory', 'AVL Insert Many Live Blocks',
+    'AVL Insert Comparisons', 'AVL Insert Visits', 'AVL Insert Rotations', 'AVL Insert Single Rotations',
+    'AVL Insert Double Rotations', 'AVL Insert Height Updates', 'AVL Insert Allocations',
+    'AVL Search Comparisons', 'AVL Delete Rotations', 'AVL Delete Height Updates',
+    'Multiset AVL Creation', 'Multiset AVL Memory',
+    'Red-Black Creation', 'Red-Black Search', 'Treap Creation', 'Treap Search',
+    'Splay Creation', 'Splay Search', 'Scapegoat Creation', 'Scapegoat Search', 'AVL Search',
+    'B-Tree Creation', 'B-Tree Bulk Load', 'B-Tree Search', 'B-Tree Range Scan', 'AVL Range Scan', 'B-Tree Memory',
+    'AVL Insert Creation', 'AVL Insert Creation (Finger)', 'AVL Search (Finger)',
+    'AVL Contains Loop', 'AVL Contains Many (Cold)', 'AVL Contains Many', 'AVL Contains Many Lookups/s',
+]
+
+DATA_TYPES = ['random', 'increasing', 'decreasing', 'a_shaped', 'constant']
+SIZES = range(10000, 100001, 10000)
+
+_free_cpus = None  # queue of the CPUs no live worker is pinned to
+_cpu = None  # the CPU this worker process holds
+
+def run_job(job):
+    file_path, data_type, size, operation = job
+    try:
+        return data_type, size, operation, OPERATIONS[operation](read_data(file_path))
+    finally:
+        if _cpu is not None:
+            _free_cpus.put(_cpu)  # one job per process (maxtasksperchild=1), so the CPU is free again
+
+def _pin_worker(free_cpus):
+    """Pool initializer: take a free CPU off the queue and pin the new worker to it."""
+    global _free_cpus, _cpu
+    _free_cpus = free_cpus
+    _cpu = free_cpus.get()
+    os.sched_setaffinity(0, {_cpu})
+
+def read_results(path):
+    """Read a results CSV back into ``{size: {column: value}}``, leaving out empty (NaN) cells."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            size = int(float(row.pop('Size')))
+            results[size] = {column: float(value) for column, value in row.items() if value != 'nan'}
+    return results
+
+def write_results(results, data_types, output_directory='.'):
+    """Merge the results into benchmark_results_<type>.csv (medians) and benchmark_stats_<type>.csv.
+
+    Cells measured in this run replace the old ones; everything else in
+    existing files is kept, so running a few operations does not wipe the
+    other columns. Result rows are ordered by size and columns follow
+    COLUMNS; the stats file has one row per timed (size, column) with the
+    full Timing.
+    """
+    header = ",".join(['Size'] + COLUMNS)
     for data_type in data_types:
-        results = []
-        for size in sizes:
+        if not results.get(data_type):
+            continue
+        path = os.path.join(output_directory, f"benchmark_results_{data_type}.csv")
+        stats_path = os.path.join(output_directory, f"benchmark_stats_{data_type}.csv")
+        merged = read_results(path)
+        for size, values in results[data_type].items():
+            merged.setdefault(size, {}).update(values)
+        stats = read_stats(stats_path) if os.path.exists(stats_path) else {}
+
+        rows = []
+        for size, values in sorted(merged.items()):
+            row = [size]
+            for column in COLUMNS:
+                value = values.get(column, float('nan'))
+                if isinstance(value, Timing):
+                    stats[(size, column)] = value
+                    value = value.median
+                row.append(value)
+            rows.append(row)
+        np.savetxt(path, rows, delimiter=",", fmt="%0.7f", header=header, comments="")
+        write_stats(stats_path, [key + (timing,) for key, timing in sorted(stats.items())])
+
+def compare_results(old_directory, new_directory, threshold=0.05):
+    """Print the measurements that regressed between two benchmark output directories."""
+    regressions = 0
+    for data_type in DATA_TYPES:
+        name = f"benchmark_stats_{data_type}.csv"
+        old_path, new_path = os.path.join(old_directory, name), os.path.join(new_directory, name)
+        if not (os.path.exists(old_path) and os.path.exists(new_path)):
+            continue
+        for size, column, before, after, ratio in compare(read_stats(old_path), read_stats(new_path), threshold):
+            regressions += 1
+            print(f"REGRESSION {data_type} {size} {column}: {before.median:.3e}s -> {after.median:.3e}s "
+                  f"(x{ratio:.2f}, CI {after.ci_low:.3e}..{after.ci_high:.3e} vs {before.ci_low:.3e}..{before.ci_high:.3e})")
+    print(f"{regressions} regression(s) found.")
+    return regressions
+
+def benchmark(directory, workers=1, operations=None, data_types=DATA_TYPES, sizes=SIZES, pin=True, output_directory='.'):
+    """Run every (data type, size, operation) job and merge the results into the CSVs.
+
+    With more than one worker the jobs go to a process pool in which every
+    job gets a fresh, optionally CPU-pinned process (maxtasksperchild=1), so
+    heaps and caches of one measurement never leak into the next.
+    """
+    jobs = []
+    for size in sorted(sizes, reverse=True):  # biggest jobs first for better packing
+        for data_type in data_types:
             file_path = f'{directory}/{data_type}_{size:08d}.txt'
             if not os.path.exists(file_path):
                 continue
-            print(f"Processing {file_path}...")
-            data = read_data(file_path)
-            data = data[1:]  # Exclude the first element if it's not part of the tree
-
-            # Create both trees
-            bst = create_bst(data)
-            avl = create_avl(data)
-
-            # Measure time for all required operations
-            time_bst_creation = measure_time(create_bst, data)
-            time_avl_creation = measure_time(create_avl, data)
-            time_bst_find_min_max = measure_time(find_min_max, bst)
-            time_avl_find_min_max = measure_time(find_min_max, avl)
-            time_bst_in_order = measure_time(print_in_order, bst) if data_type == 'random' else float('nan')  # Skip skewed BSTs
-            time_avl_in_order = measure_time(print_in_order, avl)
-            time_rebalance = measure_time(rebalance_bst, bst)
-
-            results.append([
-                size,
-                time_bst_creation, time_avl_creation,
-                time_bst_find_min_max, time_avl_find_min_max,
-                time_bst_in_order, time_avl_in_order,
-                time_rebalance
-            ])
-
-        header = "Size,BST Creation,AVL Creation,BST Find Min/Max,AVL Find Min/Max,BST In-Order,AVL In-Order,Rebalance BST"
-        np.savetxt(f"benchmark_results_{data_type}.csv", results, delimiter=",", fmt="%0.7f", header=header, comments="")
+            read_data(file_path)  # build the .npy cache once, before workers race for it
+            for operation in operations or OPERATIONS:
+                jobs.append((file_path, data_type, size, operation))
+
+    results = {}
+    def collect(result):
+        data_type, size, operation, values = result
+        print(f"Finished {data_type} {size} {operation}")
+        results.setdefault(data_type, {}).setdefault(size, {}).update(values)
+
+    if workers <= 1:
+        for job in jobs:
+            collect(run_job(job))
+    else:
+        cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, 'sched_getaffinity') else []
+        initializer, initargs = None, ()
+        if cpus:
+            # Each worker holds one CPU until its job is done, so no two
+            # running jobs ever share a CPU.
+            workers = min(workers, len(cpus))
+            free_cpus = multiprocessing.Queue()
+            for cpu in cpus:
+                free_cpus.put(cpu)
+            initializer, initargs = _pin_worker, (free_cpus,)
+        with multiprocessing.Pool(workers, initializer=initializer, initargs=initargs, maxtasksperchild=1) as pool:
+            for result in pool.imap_unordered(run_job, jobs):
+                collect(result)
+
+    write_results(results, data_types, output_directory)
 
 if __name__ == "__main__":
-    benchmark_directory = './benchmark'
-    benchmark(benchmark_directory)
+    parser = argparse.ArgumentParser(description="Benchmark the tree implementations on data/benchmark.")
+    parser.add_argument('--directory', default='./benchmark')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS))
+    parser.add_argument('--no-pin', action='store_true', help="do not pin workers to CPUs")
+    parser.add_argument('--output', default='.', help="directory for the result CSVs")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help="compare two output directories instead of running the benchmark")
+    parser.add_argument('--threshold', type=float, default=0.05, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(1 if compare_results(*args.compare, threshold=args.threshold) else 0)
+    benchmark(args.directory, workers=args.workers, operations=args.operations, pin=not args.no_pin,
+              output_directory=args.output)
@@ -14,33 +14,47 @@ def sanitize_filename(filename):
     """ Sanitize the filename by replacing or removing invalid characters. """
     return filename.replace(' ', '_').replace('/', '_or_')
 
+def load_columns(filename):
+    """ Read a results CSV into a dict mapping each header name to its column. """
+    with open(filename) as file:
+        header = file.readline().strip().split(',')
+    results = np.loadtxt(filename, delimiter=",", skiprows=1, ndmin=2)
+    return {name: results[:, i] for i, name in enumerate(header)}
+
 def load_and_plot(filename):
-    # Load data
-    results = np.loadtxt(filename, delimiter=",", skiprows=1)
+    # Load data; columns are looked up by name, older result files lack the newer ones
+    columns = load_columns(filename)
+
+    def column(name, window_size=1):
+        return smooth_data(columns[name], window_size) if name in columns else None
 
-    # Unpack data accurately according to your column description
-    sizes = results[:, 0]
-    bst_creation_times = results[:, 1]
-    avl_creation_times = results[:, 2]
-    bst_min_max_times = results[:, 3]
-    avl_min_max_times = results[:, 4]
-    bst_in_order_times = results[:, 5]
-    avl_in_order_times = results[:, 6]
-    rebalance_times = results[:, 7]
+    sizes = columns['Size']
+    avl_creation_times = column('AVL Creation')
+    compact_avl_creation_times = column('Compact AVL Creation')
+    bst_memory = column('BST Memory')
+    compact_bst_memory = column('Compact BST Memory')
+    bst_bytes_per_node = column('BST Bytes/Node')
+    compact_bst_bytes_per_node = column('Compact BST Bytes/Node')
+    avl_build_peak = column('AVL Build Peak Memory')
+    convert_peak = column('Convert To AVL Peak Memory')
+    dsw_peak = column('DSW Rebalance Peak Memory')
+    batch_insert_peak = column('AVL Insert Many Peak Memory')
 
     # Apply smoothing
-    smoothed_bst_creation = smooth_data(bst_creation_times, 5)
-    smoothed_avl_creation = smooth_data(avl_creation_times, 5)
-    smoothed_bst_min_max = smooth_data(bst_min_max_times, 5)
-    smoothed_avl_min_max = smooth_data(avl_min_max_times, 5)
-    smoothed_bst_in_order = smooth_data(bst_in_order_times, 5)
-    smoothed_avl_in_order = smooth_data(avl_in_order_times, 5)
-    smoothed_rebalance = smooth_data(rebalance_times, 5)
+    smoothed_bst_creation = column('BST Creation', 5)
+    smoothed_avl_creation = column('AVL Creation', 5)
+    smoothed_bst_min_max = column('BST Find Min/Max', 5)
+    smoothed_avl_min_max = column('AVL Find Min/Max', 5)
+    smoothed_bst_in_order = column('BST In-Order', 5)
+    smoothed_avl_in_order = column('AVL In-Order', 5)
+    smoothed_rebalance = column('Rebalance BST', 5)
 
     # Base filename without extension
     base_filename = os.path.splitext(os.path.basename(filename))[0]
 
     def plot_times(sizes, times, title, ylabel, log_scale=False):
+        if times is None:
+            return
         plt.figure(figsize=(10, 5))
         plt.plot(sizes, times, linestyle='-', color='blue', label='BST')
         if log_scale:
@@ -54,10 +68,12 @@ def load_and_plot(filename):
         plt.show()
 
     # Plot function
-    def plot_comparison(sizes, data1, data2, title, ylabel, log_scale=False):
+    def plot_comparison(sizes, data1, data2, title, ylabel, log_scale=False, labels=('BST', 'AVL')):
+        if data1 is None or data2 is None:
+            return
         plt.figure(figsize=(10, 5))
-        plt.plot(sizes, data1, linestyle='-', color='blue', label='BST')
-        plt.plot(sizes, data2, linestyle='-', color='red', label='AVL')
+        plt.plot(sizes, data1, linestyle='-', color='blue', label=labels[0])
+        plt.plot(sizes, data2, linestyle='-', color='red', label=labels[1])
         if log_scale:
             plt.yscale('log')
         plt.title(title)
@@ -74,6 +90,11 @@ def load_and_plot(filename):
     plot_comparison(sizes, smoothed_bst_min_max, smoothed_avl_min_max, "Find Min/Max Time Comparison", "Time (s)")
     plot_comparison(sizes, smoothed_bst_in_order, smoothed_avl_in_order, "In-Order Traversal Time Comparison", "Time (s)")
     plot_times(sizes, smoothed_rebalance, "Rebalancing BST Time", "Time (s)")
+    plot_comparison(sizes, avl_creation_times, compact_avl_creation_times, "Object vs Compact AVL Creation", "Time (s)", labels=('Object AVL', 'Compact AVL'))
+    plot_comparison(sizes, bst_memory, compact_bst_memory, "Object vs Compact BST Memory", "Memory (bytes)", labels=('Object BST', 'Compact BST'))
+    plot_comparison(sizes, bst_bytes_per_node, compact_bst_bytes_per_node, "Bytes per Node", "Bytes", labels=('Object BST', 'Compact BST'))
+    plot_comparison(sizes, avl_build_peak, batch_insert_peak, "Peak Memory of AVL Construction", "Memory (bytes)", labels=('makeAvlTree', 'insert_many'))
+    plot_comparison(sizes, convert_peak, dsw_peak, "Peak Memory of convert_to_avl", "Memory (bytes)", labels=('Rebuild', 'DSW in place'))
 
 # List of filenames
 filenames = ["benchmark_results_constant.csv", "benchmark_results_random.csv", 
@@ -0,0 +1,161 @@
+import csv
+import gc
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+Timing = namedtuple('Timing', 'min median p95 stddev ci_low ci_high runs')
+Timing.__doc__ = """Per-call statistics of one measurement, in seconds; ``ci_*`` bound the median."""
+
+STATS_FIELDS = ['Size', 'Column'] + list(Timing._fields)
+
+
+def bootstrap_ci(samples, confidence=0.95, resamples=2000, seed=0):
+    """Bootstrap confidence interval of the median of ``samples``."""
+    samples = np.asarray(samples)
+    if len(samples) < 2:
+        return float(samples[0]), float(samples[0])
+    rng = np.random.default_rng(seed)
+    medians = np.median(rng.choice(samples, size=(resamples, len(samples))), axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(medians, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def _calls_per_sample(function, args, min_sample_time):
+    """Like timeit's autorange: batch fast calls until one sample lasts ``min_sample_time``."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args)
+        if time.perf_counter() - start >= min_sample_time or number >= 1 << 20:
+            return number
+        number *= 10
+
+
+def measure(function, *args, setup=None, per=1, warmup=1, min_runs=5, max_runs=200,
+            min_time=0.2, max_time=10.0, min_sample_time=1e-3, target_ci=0.02):
+    """Time ``function(*args)`` and return a Timing.
+
+    After ``warmup`` untimed calls, samples are taken with the garbage
+    collector disabled until at least ``min_runs`` samples and ``min_time``
+    seconds are in and the median's confidence interval is within
+    ``target_ci`` of it, or until ``max_runs``/``max_time`` run out. Fast
+    calls are batched per sample. With ``setup`` every sample is one call to
+    ``function(*setup())`` and the setup is not timed (for operations that
+    consume their input). Results are divided by ``per``, e.g. the number of
+    keys handled per call.
+    """
+    for _ in range(warmup):
+        function(*(setup() if setup else args))
+    number = 1 if setup else _calls_per_sample(function, args, min_sample_time)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    began = time.perf_counter()
+    try:
+        while len(samples) < max_runs:
+            call_args = setup() if setup else args
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                function(*call_args)
+            end = time.perf_counter()
+            if gc_was_enabled:
+                gc.enable()
+            samples.append((end - start) / number / per)
+
+            elapsed = time.perf_counter() - began
+            if len(samples) >= min_runs and elapsed >= min_time:
+                if elapsed >= max_time:
+                    break
+                low, high = bootstrap_ci(samples)
+                median = float(np.median(samples))
+                if median == 0 or (high - low) / median <= target_ci:
+                    break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    low, high = bootstrap_ci(samples)
+    return Timing(
+        min=float(np.min(samples)),
+        median=float(np.median(samples)),
+        p95=float(np.percentile(samples, 95)),
+        stddev=float(np.std(samples, ddof=1)) if len(samples) > 1 else 0.0,
+        ci_low=low,
+        ci_high=high,
+        runs=len(samples),
+    )
+
+
+def _live_blocks():
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+
+
+def measure_memory(function, *args, setup=None):
+    """Trace one call of ``function(*args)``; return ``(peak_bytes, blocks)``.
+
+    ``peak_bytes`` is the highest traced memory above the starting point
+    during the call and ``blocks`` the number of allocations made by the
+    call that are still alive afterwards, e.g. the nodes of a tree it
+    returned. ``setup`` works as in measure() and is not traced.
+    """
+    call_args = setup() if setup else args
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.clear_traces()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = function(*call_args)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        blocks = _live_blocks()
+        del result
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return peak, blocks
+
+
+def write_stats(path, rows):
+    """Write ``(size, column, Timing)`` rows to a stats CSV."""
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(STATS_FIELDS)
+        for size, column, timing in rows:
+            writer.writerow([size, column] + list(timing))
+
+
+def read_stats(path):
+    """Read a stats CSV into ``{(size, column): Timing}``."""
+    stats = {}
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            timing = Timing(*(float(row[field]) for field in Timing._fields[:-1]), runs=int(row['runs']))
+            stats[(int(row['Size']), row['Column'])] = timing
+    return stats
+
+
+def compare(old, new, threshold=0.05):
+    """Compare two ``{(size, column): Timing}`` maps; return the regressions.
+
+    A measurement regresses when its median slowed down by more than
+    ``threshold`` and the confidence intervals do not overlap. Returns
+    ``(size, column, old Timing, new Timing, ratio)`` tuples.
+    """
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if before.median <= 0:
+            continue
+        ratio = after.median / before.median
+        if ratio > 1 + threshold and after.ci_low > before.ci_high:
+            regressions.append(key + (before, after, ratio))
+    return regressions
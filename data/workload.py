@@ -0,0 +1,134 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backends import BACKENDS, make_tree
+from ingest import load_dataset
+
+SEARCH, INSERT, DELETE, RANGE = range(4)
+OP_NAMES = ['search', 'insert', 'delete', 'range']
+
+# Fractions of (search, insert, delete, range query) operations.
+MIXES = {
+    'read_heavy': (0.90, 0.05, 0.05, 0.00),
+    'balanced': (0.50, 0.25, 0.25, 0.00),
+    'write_heavy': (0.10, 0.45, 0.45, 0.00),
+    'scan': (0.70, 0.10, 0.10, 0.10),
+}
+DISTRIBUTIONS = ['uniform', 'zipf']
+
+DATA_TYPES = ['random', 'increasing', 'decreasing', 'a_shaped', 'constant']
+SIZES = range(10000, 100001, 10000)
+FIELDS = ['Size', 'Tree', 'Mix', 'Distribution', 'Operation', 'Count', 'p50', 'p99', 'p999', 'Ops/s']
+
+
+def zipf_indices(rng, n, count, s=1.1):
+    """``count`` indices into ``range(n)`` where index i has probability ~ 1/(i+1)**s."""
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    cumulative = np.cumsum(weights)
+    cumulative /= cumulative[-1]
+    return np.minimum(np.searchsorted(cumulative, rng.random(count)), n - 1)
+
+
+def make_workload(data, count, mix, distribution='uniform', seed=0):
+    """Return ``(ops, keys)`` arrays describing ``count`` operations against ``data``.
+
+    Keys come from the distinct dataset keys plus as many fresh keys above
+    the maximum, so inserts and deletes both hit and miss. With 'zipf' a
+    few keys, spread over the key space, get most of the traffic.
+    """
+    rng = np.random.default_rng(seed)
+    existing = np.unique(data)
+    fresh = np.arange(len(existing)) + (int(existing[-1]) + 1 if len(existing) else 0)
+    universe = np.concatenate((existing, fresh))
+    if distribution == 'zipf':
+        hot = rng.permutation(len(universe))  # which keys are hot
+        keys = universe[hot[zipf_indices(rng, len(universe), count)]]
+    elif distribution == 'uniform':
+        keys = universe[rng.integers(0, len(universe), count)]
+    else:
+        raise ValueError(f"unknown key distribution {distribution!r}")
+    ops = rng.choice(len(OP_NAMES), size=count, p=MIXES[mix])
+    return ops, keys
+
+
+def replay(tree, ops, keys, range_width=100):
+    """Run the workload against ``tree``; return the latency of every operation in ns.
+
+    Each operation is timed on its own, so the latencies include the
+    ~100 ns overhead of the clock calls.
+    """
+    latencies = np.empty(len(ops), dtype=np.int64)
+    clock = time.perf_counter_ns
+    handlers = [tree.search, tree.insert, tree.delete, None]
+    count_range = tree.count_range
+    for i, (op, key) in enumerate(zip(ops.tolist(), keys.tolist())):
+        if op == RANGE:
+            start = clock()
+            count_range(key, key + range_width)
+        else:
+            handler = handlers[op]
+            start = clock()
+            handler(key)
+        latencies[i] = clock() - start
+    return latencies
+
+
+def summarize(ops, latencies):
+    """Return ``{operation: (count, p50, p99, p999, ops/s)}`` with latencies in seconds."""
+    summary = {}
+    groups = [(name, latencies[ops == op]) for op, name in enumerate(OP_NAMES)]
+    for name, group in groups + [('all', latencies)]:
+        if len(group) == 0:
+            continue
+        p50, p99, p999 = np.percentile(group, [50, 99, 99.9]) / 1e9
+        summary[name] = (len(group), p50, p99, p999, len(group) / (group.sum() / 1e9))
+    return summary
+
+
+def run(data, tree_name, mix, distribution, count=10000, seed=0):
+    tree = make_tree(tree_name, data)
+    ops, keys = make_workload(data, count, mix, distribution, seed)
+    return summarize(ops, replay(tree, ops, keys))
+
+
+def benchmark(directory, data_types=DATA_TYPES, sizes=SIZES, trees=tuple(BACKENDS), mixes=MIXES,
+              distributions=DISTRIBUTIONS, count=10000, output_directory='.'):
+    """Write workload_results_<type>.csv with one row per size, tree, mix, distribution and operation."""
+    for data_type in data_types:
+        rows = []
+        for size in sizes:
+            file_path = f'{directory}/{data_type}_{size:08d}.txt'
+            if not os.path.exists(file_path):
+                continue
+            data = load_dataset(file_path)
+            for tree_name in trees:
+                for mix in mixes:
+                    for distribution in distributions:
+                        summary = run(data, tree_name, mix, distribution, count, seed=size)
+                        for operation, values in summary.items():
+                            rows.append([size, tree_name, mix, distribution, operation] + list(values))
+                print(f"Finished {data_type} {size} {tree_name}")
+        if rows:
+            with open(os.path.join(output_directory, f"workload_results_{data_type}.csv"), 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(FIELDS)
+                writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay mixed search/insert/delete workloads against the trees.")
+    parser.add_argument('--directory', default='./benchmark')
+    parser.add_argument('--trees', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument('--mixes', nargs='+', choices=list(MIXES), default=list(MIXES))
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument('--count', type=int, default=10000, help="operations per workload")
+    parser.add_argument('--output', default='.', help="directory for the result CSVs")
+    args = parser.parse_args()
+    benchmark(args.directory, trees=args.trees, mixes=args.mixes, distributions=args.distributions,
+              count=args.count, output_directory=args.output)
@@ -0,0 +1,75 @@
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # the tree modules themselves do not need NumPy
+    np = None
+
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def parse_keys(text):
+    """Parse whitespace-separated integers into an int64 buffer.
+
+    Returns a NumPy array when NumPy is available and an ``array('q')``
+    otherwise; neither goes through a list of Python ints. Raises
+    ValueError for numbers outside the int64 range.
+    """
+    if isinstance(text, bytes):
+        text = text.decode('ascii')
+    if np is not None:
+        keys = np.fromstring(text, dtype=np.int64, sep=' ')
+        # fromstring clamps out-of-range numbers to the int64 limits, so the
+        # text is only rechecked when a limit shows up.
+        if len(keys) and ((keys == INT64_MAX) | (keys == INT64_MIN)).any():
+            _check_int64(text.split())
+        return keys
+    try:
+        return array('q', map(int, text.split()))
+    except OverflowError:
+        _check_int64(text.split())
+        raise
+
+
+def _check_int64(tokens):
+    for token in tokens:
+        if not INT64_MIN <= int(token) <= INT64_MAX:
+            raise ValueError(f"key {token} does not fit in a signed 64-bit integer")
+
+
+def read_dataset(path):
+    """Read a data/benchmark text file: a size header followed by that many keys."""
+    with open(path, 'rb') as file:
+        values = parse_keys(file.read())
+    if len(values) == 0:
+        raise ValueError(f"{path}: missing size header")
+    size = int(values[0])
+    if len(values) - 1 < size:
+        raise ValueError(f"{path}: header announces {size} keys, found {len(values) - 1}")
+    return values[1:size + 1]
+
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + '.npy'
+
+
+def load_dataset(path, cache=True):
+    """Load the keys of a dataset, going through a memory-mapped ``.npy`` cache.
+
+    The cache sits next to the text file and is rebuilt whenever it is
+    missing or older than the text. The returned array is read-only.
+    Without NumPy the text is parsed on every call.
+    """
+    if np is None or not cache:
+        return read_dataset(path)
+
+    npy = cache_path(path)
+    if not os.path.exists(npy) or os.path.getmtime(npy) < os.path.getmtime(path):
+        keys = read_dataset(path)
+        tmp = npy + '.tmp'
+        with open(tmp, 'wb') as file:
+            np.save(file, keys)
+        os.replace(tmp, npy)
+    return np.load(npy, mmap_mode='r')
@@ -2,12 +2,14 @@ import sys
 
 from bst import *  
 from tikz import *  
+from ingest import load_dataset
+from backends import BACKENDS, make_tree
+import snapshot
 
 def read_initial_tree():
     num_nodes = int(input('nodes> '))
     nodes_input = input('insert> ')
-    numbers = list(map(int, nodes_input.strip().split()))
-    return numbers
+    return list(map(int, nodes_input.strip().split()))  # Python ints: no int64 limit here
 
 def display_help():
     print("\nAvailable commands:")
@@ -16,8 +18,10 @@ def display_help():
     print("Print      - Print the tree using In-order, Pre-order, Post-order")        
     print("Remove     - Remove an element from the tree")
     print("Delete     - Delete the whole tree")
-    print("Export     - Export the tree to TikZ picture")
-    print("Rebalance  - Rebalance the AVL tree or convert BST to AVL and rebalance")
+    print("Export     - Export the tree to TikZ picture ('Export dot|json|levelorder' for other formats)")
+    print("Save       - Save the tree to a binary snapshot file")
+    print("Load       - Replace the tree with one read from a snapshot file")
+    print("Rebalance  - Convert BST to AVL by rebuilding it ('Rebalance dsw' rebalances the nodes in place)")
     print("Exit       - Exit the program (same as ctrl+C)")
 
 def process_command(command, tree, tree_type):
@@ -27,7 +31,7 @@ def process_command(command, tree, tree_type):
     if cmd == 'help':
         display_help()
     elif cmd == 'print':
-        if not tree.key:
+        if tree.size() == 0:
             print(f"{tree_type.upper()} tree is empty.")
         else:
             print(" Pre-order: ", end="")
@@ -46,28 +50,45 @@ def process_command(command, tree, tree_type):
         if len(nodes_to_delete) != num_nodes_to_delete:
             print(f"Error: Expected {num_nodes_to_delete} nodes, got {len(nodes_to_delete)}")
         else:
-            for value in nodes_to_delete:
-                if tree.delete(value):
-                    print(f"Removed {value}")
-                else:
-                    print(f"Value {value} not found")
-                    
-                if tree_type == 'avl':  
-                    tree.rebalance()
+            removed = tree.delete_many(nodes_to_delete)
+            requested = len(nodes_to_delete) if tree.multiset else len(set(nodes_to_delete))
+            print(f"Removed {removed} of {requested} values")
     elif cmd == 'delete':
         tree.delete_tree()
         print("Tree succesfully deleted.")
     elif cmd == 'export':
-        filename = input('Enter the filename to save the tree structure: ') + ".tex"
-        export(tree, filename)
+        if tree.size() == 0:
+            print(f"{tree_type.upper()} tree is empty.")
+            return tree, tree_type
+        if not isinstance(tree, BinaryTree):
+            print(f"Export works on binary trees only, not {tree_type.upper()}.")
+            return tree, tree_type
+        fmt = args[1].lower() if len(args) > 1 else 'tikz'
+        if fmt not in EXPORTERS:
+            print(f"Unknown format {fmt}. Available: {', '.join(EXPORTERS)}")
+            return tree, tree_type
+        filename = input('Enter the filename to save the tree structure: ') + EXPORTERS[fmt][1]
+        export(tree.root, filename, format=fmt)
         print('Tree exported successfully.')
+    elif cmd == 'save':
+        filename = input('Enter the snapshot filename: ')
+        snapshot.save(tree, filename)
+        print(f'Tree saved ({tree.size()} nodes).')
+    elif cmd == 'load':
+        filename = input('Enter the snapshot filename: ')
+        tree = snapshot.load(filename)
+        tree_type = tree.tree_type
+        print(f'Loaded {tree_type.upper()} tree ({tree.size()} nodes).')
     elif cmd == 'rebalance':
         if tree_type == 'bst':
-            tree = tree.convert_to_avl()  # Convert BST to AVL
+            in_place = len(args) > 1 and args[1].lower() == 'dsw'
+            tree = tree.convert_to_avl(in_place=in_place)  # Convert BST to AVL
             tree_type = 'avl'  # Update tree type to AVL
             print("Converted BST to AVL and rebalanced.")
-        if tree_type == 'avl':
-            tree.rebalance()
+        elif tree_type != 'avl':
+            # The other backends restore their own balance on every update.
+            print(f"{tree_type.upper()} tree keeps itself balanced; nothing to rebalance.")
+            return tree, tree_type
         print("Tree rebalanced. \nPre-Order: ", end="")
         tree.traverse_pre_order()
         print()
@@ -80,27 +101,42 @@ def process_command(command, tree, tree_type):
         sys.exit(0)
     else:
         print('Invalid command. Type "help" for a list of commands.')
+    return tree, tree_type
 
 def main():
+    multiset = '--multiset' in sys.argv  # keep duplicates, counted per node
+    if multiset:
+        sys.argv.remove('--multiset')
+    finger = '--finger' in sys.argv  # start searches and inserts at the last accessed node
+    if finger:
+        sys.argv.remove('--finger')
     if len(sys.argv) < 3 or sys.argv[1] != '--tree':
-        print("Please specify the tree type with 'python3 main.py --tree AVL' or 'python3 main.py --tree BST'.")
+        print("Please specify the tree type with 'python3 main.py --tree AVL' or 'python3 main.py --tree BST'")
+        print(f"(available: {', '.join(BACKENDS)})")
+        print("(optionally followed by '--file data/benchmark/random_00005000.txt', '--multiset' and/or '--finger').")
         sys.exit(1)
 
     tree_type = sys.argv[2].lower()
+    if tree_type not in BACKENDS:
+        print(f"Unknown tree type {tree_type}. Available: {', '.join(BACKENDS)}")
+        sys.exit(1)
+    for flag, wanted in (('--multiset', multiset), ('--finger', finger)):
+        if wanted and not issubclass(BACKENDS[tree_type], BinaryTree):
+            print(f"{flag} is not supported by the {tree_type.upper()} tree.")
+            sys.exit(1)
 
-    numbers = read_initial_tree()
-
-    if tree_type == 'avl':
-        tree = makeAvlTree(numbers)  
+    if len(sys.argv) >= 5 and sys.argv[3] == '--file':
+        numbers = load_dataset(sys.argv[4])  # e.g. data/benchmark/random_00005000.txt
     else:
-        tree = binTreeNode(tree_type='bst')  
-        for num in numbers:
-            tree.insert(num)
+        numbers = read_initial_tree()
+
+    options = {'use_finger': True} if finger else {}
+    tree = make_tree(tree_type, numbers, multiset=multiset, **options)
 
     while True:
         try:
             command = input('\naction> ')
-            process_command(command, tree, tree_type)  
+            tree, tree_type = process_command(command, tree, tree_type)
         except Exception as e:
             print(f"An error occurred: {e}")
 
@@ -0,0 +1,265 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import chain, repeat
+
+from bst import AVLTree, BinaryTree, _fix_heights
+
+# Layout (little-endian):
+#   header  MAGIC, tree kind (0 = BST, 1 = AVL), flags (MULTISET | ORDER_STATS),
+#           6 padding bytes, node count
+#   keys    node count * int64, in pre-order
+#   shape   2 bits per node in the same order: bit 0 = has left, bit 1 = has right
+#   counts  multisets only: zero padding to a multiple of 8 bytes, then
+#           node count * int64 key multiplicities in pre-order
+MAGIC = b'AISDTRE1'
+HEADER = struct.Struct('<8sBB6xQ')
+CHUNK = 1 << 16
+MULTISET = 1  # flag bits
+ORDER_STATS = 2
+
+_KINDS = {'bst': 0, 'avl': 1}
+_TREES = {0: BinaryTree, 1: AVLTree}
+
+
+def _to_little_endian(keys):
+    if sys.byteorder == 'big':
+        keys.byteswap()
+    return keys
+
+
+def _shape_bytes(n, multiset):
+    size = (n + 3) // 4
+    return -(-size // 8) * 8 if multiset else size
+
+
+def _file_size(n, multiset):
+    return HEADER.size + 8 * n + _shape_bytes(n, multiset) + (8 * n if multiset else 0)
+
+
+def save(tree, path):
+    """Write ``tree`` (a BinaryTree or AVLTree) to ``path`` as a binary snapshot.
+
+    The snapshot is written to a temporary file that replaces ``path`` only
+    once complete, so a key outside the int64 range (ValueError) leaves any
+    previous file in place.
+    """
+    if tree.tree_type not in _KINDS:
+        raise ValueError(f"snapshots only hold BST and AVL trees, not {tree.tree_type}")
+    tmp = os.fspath(path) + '.tmp'
+    try:
+        _write(tree, tmp)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+
+
+def _write(tree, path):
+    n = _node_count(tree.root) if tree.multiset else tree.size()
+    shape = bytearray(_shape_bytes(n, tree.multiset))
+    counts = array('q')
+    with open(path, 'wb') as file:
+        flags = (MULTISET if tree.multiset else 0) | (ORDER_STATS if tree.order_stats else 0)
+        file.write(HEADER.pack(MAGIC, _KINDS[tree.tree_type], flags, n))
+        chunk = array('q')
+        i = 0
+        stack = [tree.root] if tree.root else []
+        while stack:
+            node = stack.pop()
+            try:
+                chunk.append(node.key)
+            except OverflowError:
+                raise ValueError(f"key {node.key} does not fit in a signed 64-bit integer") from None
+            if tree.multiset:
+                counts.append(node.count)
+            bits = (node.left is not None) | (node.right is not None) << 1
+            shape[i >> 2] |= bits << ((i & 3) * 2)
+            i += 1
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+            if len(chunk) == CHUNK:
+                file.write(_to_little_endian(chunk).tobytes())
+                chunk = array('q')
+        file.write(_to_little_endian(chunk).tobytes())
+        file.write(shape)
+        file.write(_to_little_endian(counts).tobytes())
+
+
+def _node_count(root):
+    """Nodes under ``root``; differs from the key count only in a multiset."""
+    n = 0
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        n += 1
+        if node.left:
+            stack.append(node.left)
+        if node.right:
+            stack.append(node.right)
+    return n
+
+
+def _read_header(file, path):
+    raw = file.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: not a tree snapshot")
+    magic, kind, flags, n = HEADER.unpack(raw)
+    if magic != MAGIC or kind not in _TREES:
+        raise ValueError(f"{path}: not a tree snapshot")
+    size, expected = os.fstat(file.fileno()).st_size, _file_size(n, bool(flags & MULTISET))
+    if size != expected:
+        raise ValueError(f"{path}: {size} bytes, but a snapshot of {n} nodes takes {expected}")
+    return kind, flags, n
+
+
+def _build(keys, shape, tree_type, counts=None, node_class=None):
+    """Rebuild the exact tree shape from pre-order keys and shape bits in O(n)."""
+    root = None
+    prev = None
+    prev_has_left = False
+    waiting_right = []  # nodes whose right subtree has not started yet
+    for i, key in enumerate(keys):
+        bits = shape[i >> 2] >> ((i & 3) * 2)
+        if prev is None:
+            node = root = node_class(key=key, tree_type=tree_type)
+        elif prev_has_left:
+            node = prev.left = node_class(key=key, parent=prev, tree_type=tree_type)
+        else:
+            parent = waiting_right.pop()
+            node = parent.right = node_class(key=key, parent=parent, tree_type=tree_type)
+        if counts is not None and counts[i] != 1:
+            node.count = counts[i]
+        if bits & 2:
+            waiting_right.append(node)
+        prev = node
+        prev_has_left = bool(bits & 1)
+    if root:
+        _fix_heights(root)
+    return root
+
+
+def _iter_keys(file, n):
+    remaining = n
+    while remaining:
+        count = min(remaining, CHUNK)
+        chunk = array('q')
+        chunk.frombytes(file.read(count * 8))
+        yield from _to_little_endian(chunk)
+        remaining -= count
+
+
+def _new_tree(kind, flags):
+    return _TREES[kind](multiset=bool(flags & MULTISET), order_stats=bool(flags & ORDER_STATS))
+
+
+def load(path):
+    """Read a snapshot written by save() and return the rebuilt tree."""
+    with open(path, 'rb') as file:
+        kind, flags, n = _read_header(file, path)
+        multiset = bool(flags & MULTISET)
+        file.seek(HEADER.size + 8 * n)
+        shape = file.read(_shape_bytes(n, multiset))
+        counts = list(_iter_keys(file, n)) if multiset else None
+        file.seek(HEADER.size)
+        tree = _new_tree(kind, flags)
+        tree.root = _build(_iter_keys(file, n), shape, tree.tree_type, counts, tree.node_class)
+    tree._size = sum(counts) if multiset else n
+    tree._height = tree.root.height if tree.root else 0
+    return tree
+
+
+class SnapshotView:
+    """Read-only, memory-mapped view of a snapshot that never builds nodes.
+
+    ``keys`` is the pre-order sequence of distinct keys backed directly by
+    the file, and ``counts`` their multiplicities for a multiset snapshot
+    (None otherwise). The iterators repeat keys by their count.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder == 'big':
+            raise NotImplementedError("memory-mapped snapshots need a little-endian host")
+        with open(path, 'rb') as file:
+            kind, self._flags, self.n = _read_header(file, path)
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._kind = kind
+        self.multiset = bool(self._flags & MULTISET)
+        self.tree_type = _TREES[kind].tree_type
+        start = HEADER.size
+        end = start + 8 * self.n
+        self.keys = memoryview(self._mmap)[start:end].cast('q')
+        self.shape = memoryview(self._mmap)[end:end + _shape_bytes(self.n, self.multiset)]
+        self.counts = None
+        if self.multiset:
+            start = end + _shape_bytes(self.n, True)
+            self.counts = memoryview(self._mmap)[start:start + 8 * self.n].cast('q')
+
+    def __len__(self):
+        return self.n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.keys.release()
+        self.shape.release()
+        if self.counts is not None:
+            self.counts.release()
+        self._mmap.close()
+
+    def has_left(self, i):
+        return bool(self.shape[i >> 2] >> ((i & 3) * 2) & 1)
+
+    def has_right(self, i):
+        return bool(self.shape[i >> 2] >> ((i & 3) * 2) & 2)
+
+    def iter_pre_order(self):
+        if self.counts is None:
+            return iter(self.keys)
+        return chain.from_iterable(map(repeat, self.keys, self.counts))
+
+    def iter_in_order(self):
+        keys, shape, counts = self.keys, self.shape, self.counts
+        waiting = []  # nodes whose left subtree is still being read
+        for i in range(self.n):
+            bits = shape[i >> 2] >> ((i & 3) * 2)
+            if bits & 1:
+                waiting.append(i)
+                continue
+            yield keys[i]
+            if counts is not None and counts[i] > 1:
+                yield from repeat(keys[i], counts[i] - 1)
+            if bits & 2:
+                continue
+            # This subtree is finished: emit ancestors whose left side it closed.
+            while waiting:
+                j = waiting.pop()
+                yield keys[j]
+                if counts is not None and counts[j] > 1:
+                    yield from repeat(keys[j], counts[j] - 1)
+                if shape[j >> 2] >> ((j & 3) * 2) & 2:
+                    break
+
+    def findMin(self):
+        if self.n == 0:
+            return None
+        i = 0
+        while self.has_left(i):
+            i += 1
+        return self.keys[i]
+
+    def to_tree(self):
+        tree = _new_tree(self._kind, self._flags)
+        tree.root = _build(self.keys, self.shape, tree.tree_type, self.counts, tree.node_class)
+        tree._size = sum(self.counts) if self.multiset else self.n
+        tree._height = tree.root.height if tree.root else 0
+        return tree
@@ -0,0 +1,75 @@
+"""Structural checks shared by the tree tests."""
+import math
+
+
+def post_order(root):
+    """Every node below ``root``, children before parents (iterative: sorted streams make deep BSTs)."""
+    nodes = []
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(child for child in (node.left, node.right) if child)
+    return reversed(nodes)
+
+
+def check_nodes(root):
+    """Check order, parent links and subtree sizes; return the height of every node."""
+    assert root is None or root.parent is None
+    heights = {None: 0}
+    for node in post_order(root):
+        assert node.sized == root.sized  # one node class per tree
+        if node.left:
+            assert node.left.parent is node and node.left.key < node.key
+        if node.right:
+            assert node.right.parent is node and node.right.key > node.key
+        if node.sized:
+            assert node.subtree_size == (node.count + (node.left.subtree_size if node.left else 0)
+                                         + (node.right.subtree_size if node.right else 0))
+        else:
+            assert 'subtree_size' not in node.__dict__
+        heights[node] = 1 + max(heights[node.left], heights[node.right])
+    return heights
+
+
+def check_avl(root, heights):
+    for node in post_order(root):
+        assert abs(heights[node.left] - heights[node.right]) <= 1
+        assert node.height == heights[node]
+
+
+def check_red_black(root):
+    assert root is None or not root.red
+    black_heights = {None: 1}
+    for node in post_order(root):
+        if node.red:
+            assert not (node.left and node.left.red) and not (node.right and node.right.red)
+        assert black_heights[node.left] == black_heights[node.right]
+        black_heights[node] = black_heights[node.left] + (not node.red)
+
+
+def check_heap(root):
+    for node in post_order(root):
+        for child in (node.left, node.right):
+            assert child is None or child.priority <= node.priority
+
+
+def check_tree(tree, model):
+    """Check ``tree`` against ``model``: a set, or a Counter for a multiset."""
+    expected = sorted(model.elements()) if tree.multiset else sorted(model)
+    assert list(tree) == expected
+    assert len(tree) == len(expected)
+    assert tree.findMin() == (expected[0] if expected else None)
+    assert tree.findMax() == (expected[-1] if expected else None)
+    heights = check_nodes(tree.root)
+    assert tree.root is None or tree.root.sized == tree.order_stats
+    assert tree.height() == heights[tree.root]
+    if tree.tree_type == 'avl':
+        check_avl(tree.root, heights)
+    elif tree.tree_type == 'rb':
+        check_red_black(tree.root)
+    elif tree.tree_type == 'treap':
+        check_heap(tree.root)
+    elif tree.tree_type == 'scapegoat' and tree.max_size:
+        assert heights[tree.root] <= math.log(tree.max_size, 1 / tree.alpha) + 2
+    return heights
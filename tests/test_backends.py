@@ -0,0 +1,130 @@
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+from backends import BACKENDS, make_tree
+from bst import BinaryTree, _subtree_height
+from invariants import check_tree
+
+BINARY_BACKENDS = [name for name, cls in BACKENDS.items() if issubclass(cls, BinaryTree)]
+
+
+def random_operations(tree, model, rng, steps, universe):
+    for _ in range(steps):
+        key = rng.randrange(universe)
+        if rng.random() < 0.55:
+            assert tree.insert(key) == (tree.multiset or key not in model)
+            if tree.multiset or key not in model:
+                model[key] += 1
+        else:
+            assert tree.delete(key) == (key in model)
+            model -= Counter([key])
+        if rng.random() < 0.2:
+            key = rng.randrange(universe)
+            assert (tree.search(key) is not None) == (key in model)
+
+
+@pytest.mark.parametrize('name', BINARY_BACKENDS)
+@pytest.mark.parametrize('multiset', [False, True])
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_random_operations_keep_invariants(name, multiset, order_stats):
+    rng = random.Random(f'{name}-{multiset}-{order_stats}')
+    for _ in range(20):
+        keys = [rng.randrange(200) for _ in range(rng.randrange(60))]
+        tree = make_tree(name, keys, multiset=multiset, order_stats=order_stats)
+        model = Counter(keys) if multiset else Counter(set(keys))
+        check_tree(tree, model)
+        for _ in range(10):
+            random_operations(tree, model, rng, 30, 200)
+            check_tree(tree, model)
+        expected = sorted(model.elements())
+        assert [tree.rank(key) for key in range(0, 200, 10)] == [
+            sum(1 for k in expected if k < key) for key in range(0, 200, 10)]
+        if expected:
+            assert tree.select(len(expected) // 2) == expected[len(expected) // 2]
+
+
+@pytest.mark.parametrize('name', BINARY_BACKENDS)
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_sorted_streams(name, order_stats):
+    for keys in (range(2000), range(2000, 0, -1)):
+        tree = make_tree(name, order_stats=order_stats)
+        for key in keys:
+            tree.insert(key)
+        check_tree(tree, set(keys))
+        for key in range(0, 2000, 3):
+            tree.delete(key)
+        check_tree(tree, set(keys) - set(range(0, 2000, 3)))
+
+
+@pytest.mark.parametrize('name', BINARY_BACKENDS)
+def test_delete_many(name):
+    rng = random.Random(name)
+    for multiset in (False, True):
+        keys = [rng.randrange(300) for _ in range(400)]
+        tree = make_tree(name, keys, multiset=multiset)
+        model = Counter(keys) if multiset else Counter(set(keys))
+        batch = [rng.randrange(300) for _ in range(200)]
+        removed = model & Counter(batch) if multiset else Counter(set(model) & set(batch))
+        assert tree.delete_many(batch) == sum(removed.values())
+        check_tree(tree, model - removed)
+
+
+def test_splay_search_updates_height():
+    tree = make_tree('splay', range(1, 8))
+    assert tree.height() == 7
+    tree.search(1)
+    assert tree.height() == _subtree_height(tree.root)
+
+
+@pytest.mark.parametrize('name', [name for name in BACKENDS if name not in ('bst', 'avl')])
+def test_rebalance_command_leaves_self_balancing_trees_alone(capsys, name):
+    tree = make_tree(name, range(10))
+    assert main.process_command('rebalance', tree, name) == (tree, name)
+    assert capsys.readouterr().out == f"{name.upper()} tree keeps itself balanced; nothing to rebalance.\n"
+
+
+def test_rebalance_command_converts_a_bst(capsys):
+    tree, tree_type = main.process_command('rebalance dsw', make_tree('bst', range(7)), 'bst')
+    assert tree_type == 'avl' and tree.tree_type == 'avl'
+    check_tree(tree, set(range(7)))
+    assert "Converted BST to AVL" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('name', BINARY_BACKENDS)
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_finger_search(name, order_stats):
+    rng = random.Random(name)
+    tree = make_tree(name, rng.sample(range(1000), 300), order_stats=order_stats, use_finger=True)
+    assert tree.use_finger
+    model = set(tree)
+    for _ in range(20):
+        start = rng.randrange(1000)
+        for key in range(start, start + 20):
+            assert (tree.search(key) is not None) == (key in model)
+            assert tree.insert(key) == (key not in model)
+            model.add(key)
+        check_tree(tree, model)
+        for key in rng.sample(sorted(model), 10):
+            tree.delete(key)
+            model.discard(key)
+
+
+@pytest.mark.parametrize('name', BINARY_BACKENDS)
+def test_appends_at_both_ends_skip_the_descent(name):
+    tree = make_tree(name)
+    with tree.counting() as stats:
+        for key in range(1000, 2000):
+            tree.insert(key)
+        ascending = stats.comparisons
+        for key in range(999, -1, -1):
+            tree.insert(key)
+    # One comparison with the maximum per ascending key; the maximum and
+    # then the minimum per descending one.
+    assert ascending == 999 and stats.comparisons - ascending == 2000
+    check_tree(tree, set(range(2000)))
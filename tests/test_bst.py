@@ -0,0 +1,297 @@
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bst
+from bst import AVLTree, BinaryTree, makeAvlTree
+from invariants import check_avl, check_nodes, check_tree, post_order
+
+
+def test_post_order_keeps_left_only_subtrees(capsys):
+    tree = BinaryTree([5, 3, 8, 1, 4, 9])
+    tree.delete(3)  # 4 takes over 3's node and keeps 1 as its only (left) child
+    tree.traverse_post_order()
+    assert capsys.readouterr().out.split() == ['1', '4', '9', '8', '5']
+    assert list(tree.iter_post_order()) == [1, 4, 9, 8, 5]
+
+
+def test_traversals_of_a_degenerate_tree(capsys):
+    n = 5000  # far deeper than the recursion limit
+    tree = BinaryTree(range(n))
+    tree.traverse_pre_order()
+    tree.traverse_in_order()
+    tree.traverse_post_order()
+    assert capsys.readouterr().out.split() == [str(key) for key in list(range(n)) * 2 + list(range(n - 1, -1, -1))]
+    assert tree.findMax() == n - 1
+    tree.delete_tree()
+    assert tree.size() == 0
+
+
+def test_node_delete_returns_root():
+    root = makeAvlTree(list(range(1, 8)))
+    for key in (1, 2, 3):
+        root = root.delete(key)
+        assert root.parent is None
+        check_avl(root, check_nodes(root))
+    assert list(root.iter_in_order()) == [4, 5, 6, 7]
+    assert root.delete(100) is root
+
+
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_avl_insert_and_delete_keep_balance(order_stats):
+    rng = random.Random(3)
+    tree = AVLTree(order_stats=order_stats)
+    model = set()
+    for _ in range(20):
+        for _ in range(100):
+            key = rng.randrange(500)
+            if rng.random() < 0.6:
+                assert tree.insert(key) == (key not in model)
+                model.add(key)
+            else:
+                assert tree.delete(key) == (key in model)
+                model.discard(key)
+        check_tree(tree, model)
+
+
+def test_dsw_rebalances_the_same_nodes():
+    for keys in (list(range(3000)), random.Random(6).sample(range(10000), 3000), [7]):
+        bst = BinaryTree(keys)
+        nodes = {id(node) for node in post_order(bst.root)}
+        avl = bst.convert_to_avl(in_place=True)
+        assert bst.root is None and len(bst) == 0
+        assert {id(node) for node in post_order(avl.root)} == nodes
+        heights = check_tree(avl, set(keys))
+        assert heights[avl.root] == len(keys).bit_length()  # complete apart from the last level
+
+
+def test_rebuild_copies_the_keys():
+    bst = BinaryTree(random.Random(7).sample(range(1000), 300))
+    avl = bst.convert_to_avl()
+    check_tree(avl, set(bst))
+    assert list(bst) == list(avl)
+
+
+
+def test_bst_delete_many_walk():
+    rng = random.Random(8)
+    for _ in range(50):
+        keys = [rng.randrange(400) for _ in range(rng.randrange(200))]
+        tree, model = BinaryTree(keys), set(keys)
+        batch = [rng.randrange(400) for _ in range(rng.randrange(100))]
+        assert tree.delete_many(batch) == len(model & set(batch))
+        check_tree(tree, model - set(batch))
+
+
+def test_multiset_delete_many_removes_one_copy_per_entry():
+    rng = random.Random(9)
+    for tree_class in (BinaryTree, AVLTree):
+        for _ in range(30):
+            keys = [rng.randrange(50) for _ in range(rng.randrange(200))]
+            tree, model = tree_class(keys, multiset=True), Counter(keys)
+            batch = [rng.randrange(50) for _ in range(rng.randrange(100))]
+            assert tree.delete_many(batch) == sum((model & Counter(batch)).values())
+            check_tree(tree, model - Counter(batch))
+
+
+def test_avl_batch_updates():
+    rng = random.Random(2)
+    model = set(rng.sample(range(10 ** 5), 5000))
+    tree = AVLTree.from_keys(list(model))
+    for size in (1, 10, 100, 1000, 20000):
+        batch = [rng.randrange(10 ** 5) for _ in range(size)]
+        assert tree.insert_many(batch) == len(set(batch) - model)
+        model |= set(batch)
+        check_tree(tree, model)
+        batch = [rng.randrange(10 ** 5) for _ in range(size)]
+        assert tree.delete_many(batch) == len(set(batch) & model)
+        model -= set(batch)
+        check_tree(tree, model)
+
+
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_split_join_round_trip(order_stats):
+    rng = random.Random(0)
+    for _ in range(50):
+        keys = set(rng.sample(range(2000), rng.randrange(300)))
+        key = rng.randrange(2000)
+        left, found, right = AVLTree(list(keys), order_stats=order_stats).split(key)
+        assert found == (key in keys)
+        check_tree(left, {k for k in keys if k < key})
+        check_tree(right, {k for k in keys if k > key})
+        check_tree(left.join(right), keys - {key})
+
+
+def test_set_operations():
+    rng = random.Random(1)
+    for _ in range(50):
+        a = set(rng.sample(range(500), rng.randrange(150)))
+        b = set(rng.sample(range(500), rng.randrange(150)))
+        check_tree(AVLTree(list(a)).union(AVLTree(list(b))), a | b)
+        check_tree(AVLTree(list(a)).intersection(AVLTree(list(b))), a & b)
+        check_tree(AVLTree(list(a)).difference(AVLTree(list(b))), a - b)
+
+
+def test_set_operations_on_sized_and_unsized_trees():
+    a, b = set(range(0, 300, 2)), set(range(0, 300, 3))
+    for sized_a, sized_b in ((True, True), (True, False), (False, True)):
+        union = AVLTree(list(a), order_stats=sized_a).union(AVLTree(list(b), order_stats=sized_b))
+        check_tree(union, a | b)
+        assert union.order_stats == sized_a
+        left, right = AVLTree(range(100), order_stats=sized_a), AVLTree(range(100, 200), order_stats=sized_b)
+        check_tree(left.join(right), set(range(200)))
+
+
+@pytest.mark.parametrize('tree_class', [BinaryTree, AVLTree])
+@pytest.mark.parametrize('order_stats', [False, True])
+@pytest.mark.parametrize('multiset', [False, True])
+def test_order_statistics(tree_class, order_stats, multiset):
+    rng = random.Random(4)
+    keys = [rng.randrange(200) for _ in range(300)]
+    tree = tree_class(keys, multiset=multiset, order_stats=order_stats)
+    for key in keys[::3]:
+        tree.delete(key)
+    model = sorted(tree)
+    check_tree(tree, Counter(model) if multiset else set(model))
+    for value in range(-1, 202, 7):
+        assert tree.rank(value) == sum(1 for key in model if key < value)
+        assert tree.count_range(value, value + 30) == sum(1 for key in model if value <= key <= value + 30)
+    assert [tree.select(k) for k in range(len(model))] == model
+    assert tree.root.size() == len(model)
+    for k in (-1, len(model)):
+        with pytest.raises(IndexError):
+            tree.select(k)
+
+
+def test_parallel_set_operations_need_two_large_inputs(monkeypatch):
+    monkeypatch.setattr(bst, 'PARALLEL_THRESHOLD', 100)
+    calls = []
+    real = bst._parallel_set_operation
+    monkeypatch.setattr(bst, '_parallel_set_operation', lambda *args: calls.append(args) or real(*args))
+    big, small = set(range(0, 3000, 2)), {1, 2, 3}
+    check_tree(AVLTree(list(big)).union(AVLTree(list(small)), workers=2), big | small)
+    assert not calls
+    other = set(range(0, 3000, 3))
+    check_tree(AVLTree(list(big)).difference(AVLTree(list(other)), workers=2), big - other)
+    assert len(calls) == 1
+
+
+def test_morris_in_order_matches_the_stack_walk():
+    keys = random.Random(5).sample(range(1000), 300)
+    for tree in (BinaryTree(keys), AVLTree(keys), BinaryTree(keys * 2, multiset=True), BinaryTree(range(3000))):
+        assert list(tree.iter_in_order_morris()) == list(tree.iter_in_order())
+        assert tree.root.in_order_keys(morris=True) == tree.root.in_order_keys()
+
+
+def test_morris_closed_early_leaves_no_threads():
+    keys = random.Random(6).sample(range(1000), 300)
+    for stop in (0, 1, 50, 299):
+        tree = BinaryTree(keys)
+        links = [(node, node.left, node.right) for node in post_order(tree.root)]
+        walk = tree.iter_in_order_morris()
+        assert [next(walk) for _ in range(stop + 1)] == sorted(keys)[:stop + 1]
+        walk.close()
+        # Compare saved links rather than walk the tree: a leftover thread is a cycle.
+        assert all(node.left is left and node.right is right for node, left, right in links)
+        check_tree(tree, set(keys))
+
+
+def test_counting_covers_every_probe():
+    tree = BinaryTree([2, 1, 3])
+    with tree.counting() as stats:
+        tree.search(3)  # 3 < 2, 3 > 2, then 3 < 3, 3 > 3
+    assert (stats.comparisons, stats.visits, stats.allocations) == (4, 2, 0)
+
+    tree = AVLTree()
+    with tree.counting() as stats:
+        for key in range(100):  # every key is a new maximum: one comparison each
+            tree.insert(key)
+    assert (stats.comparisons, stats.visits, stats.allocations) == (99, 99, 100)
+    assert all(type(key) is int for key in tree)
+    check_tree(tree, set(range(100)))
+
+    tree = BinaryTree([0, 100])
+    tree.use_finger = True
+    tree.search(100)
+    with tree.counting() as stats:
+        # 99 > 100, 99 < 0 for the ends; 99 > 100, 99 < 100, 99 >= 0, 99 == 0
+        # to climb from the finger; 99 < 100 to attach.
+        tree.insert(99)
+    assert stats.comparisons == 7 and stats.visits == 5
+    assert tree.root.search.__name__ == 'search' and BinaryTree.insert.__name__ == 'insert'
+
+
+def test_counting_a_splay_search():
+    from backends import SplayTree
+    tree = SplayTree([2, 1, 3])
+    with tree.counting() as stats:
+        assert tree.search(3) is tree.root and tree.search(4) is None
+    assert stats.comparisons > 0 and stats.visits > 0
+
+
+@pytest.mark.parametrize('tree_class', [BinaryTree, AVLTree])
+def test_multiset_random_operations(tree_class):
+    rng = random.Random(10)
+    tree = tree_class(multiset=True)
+    model = Counter()
+    for _ in range(20):
+        for _ in range(100):
+            key = rng.randrange(40)
+            if rng.random() < 0.6:
+                assert tree.insert(key)
+                model[key] += 1
+            else:
+                assert tree.delete(key) == (model[key] > 0)
+                model -= Counter([key])
+        check_tree(tree, model)
+        assert all(tree.count(key) == model[key] for key in range(40))
+    expected = sorted(model.elements())
+    assert list(tree.iter_reverse()) == expected[::-1]
+    assert sorted(tree.iter_pre_order()) == sorted(tree.iter_post_order()) == expected
+    assert list(tree.iter_range(10, 20)) == [key for key in expected if 10 <= key <= 20]
+
+
+def test_multiset_bulk_load_and_conversion():
+    keys = [random.Random(11).randrange(30) for _ in range(300)]
+    model = Counter(keys)
+    check_tree(AVLTree.from_keys(keys, multiset=True), model)
+    np = pytest.importorskip('numpy')
+    check_tree(AVLTree.from_keys(np.array(keys), multiset=True), model)
+    check_tree(BinaryTree(keys, multiset=True).convert_to_avl(), model)
+    check_tree(BinaryTree(keys, multiset=True).convert_to_avl(in_place=True), model)
+    assert not BinaryTree(keys).multiset and len(BinaryTree(keys)) == len(model)
+
+
+def test_finger_insert_near_the_last_access():
+    tree = AVLTree.from_keys(range(0, 200000, 2), use_finger=True)
+    assert tree.search(100000) is not None
+    with tree.counting() as stats:
+        tree.insert(100001)
+    near = stats.comparisons
+    tree.use_finger = False
+    stats.reset()
+    with tree.counting():
+        tree.insert(100003)
+    assert near * 2 < stats.comparisons  # the root is about 17 levels up
+
+
+@pytest.mark.parametrize('multiset', [False, True])
+def test_batch_lookups_follow_updates(multiset):
+    np = pytest.importorskip('numpy')
+    rng = random.Random(12)
+    keys = [rng.randrange(500) for _ in range(300)]
+    tree = AVLTree(keys, multiset=multiset)
+    queries = np.arange(-5, 505)
+    for _ in range(3):
+        distinct = sorted(set(tree))
+        index = tree.search_many(queries)
+        assert index.tolist() == [distinct.index(q) if q in distinct else -1 for q in queries.tolist()]
+        assert tree.contains_many(queries).tolist() == [tree.search(q) is not None for q in queries.tolist()]
+        assert tree.rank_many(queries).tolist() == [tree.rank(q) for q in queries.tolist()]
+        tree.insert(rng.randrange(500))  # the cached view must be dropped
+        tree.delete(rng.choice(distinct))
+    assert AVLTree().contains_many(queries).sum() == 0
@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btree import BTree
+
+
+def check_btree(tree, model):
+    """Check key order, node fill, leaf depth and the leaf chain against ``model``."""
+    expected = sorted(model)
+    assert list(tree) == expected
+    assert len(tree) == len(expected)
+    assert tree.findMin() == (expected[0] if expected else None)
+    assert tree.findMax() == (expected[-1] if expected else None)
+
+    leaves = []
+    stack = [(tree.root, None, None, 1)]  # node, lower bound (inclusive), upper bound (exclusive), depth
+    while stack:
+        node, lo, hi, depth = stack.pop()
+        keys = node.keys
+        assert keys == sorted(keys) and len(set(keys)) == len(keys)
+        assert len(keys) <= tree.max_keys
+        if node is not tree.root:
+            assert len(keys) >= tree.min_keys
+        assert all((lo is None or key >= lo) and (hi is None or key < hi) for key in keys)
+        if node.children is None:
+            leaves.append((lo, node, depth))
+            continue
+        assert len(node.children) == len(keys) + 1
+        bounds = [lo] + keys + [hi]
+        for i, child in enumerate(node.children):
+            stack.append((child, bounds[i], bounds[i + 1], depth + 1))
+
+    assert len({depth for _, _, depth in leaves}) == 1
+    assert leaves[0][2] == tree.height()
+    leaves.sort(key=lambda leaf: (leaf[0] is not None, leaf[0]))
+    chain = []
+    leaf = tree.first
+    while leaf is not None:
+        chain.append(leaf)
+        leaf = leaf.next
+    assert chain == [node for _, node, _ in leaves]
+
+
+@pytest.mark.parametrize('order', [4, 5, 8, 64])
+def test_random_operations_keep_invariants(order):
+    rng = random.Random(order)
+    for _ in range(10):
+        model = set(rng.sample(range(3000), rng.randrange(400)))
+        tree = BTree.from_keys(list(model), order=order)
+        check_btree(tree, model)
+        for _ in range(10):
+            for _ in range(100):
+                key = rng.randrange(3000)
+                if rng.random() < 0.5:
+                    assert tree.insert(key) == (key not in model)
+                    model.add(key)
+                else:
+                    assert tree.delete(key) == (key in model)
+                    model.discard(key)
+            check_btree(tree, model)
+            lo = rng.randrange(3000)
+            hi = lo + rng.randrange(200)
+            assert list(tree.iter_range(lo, hi)) == [key for key in sorted(model) if lo <= key <= hi]
+            assert tree.count_range(lo, hi) == sum(lo <= key <= hi for key in model)
+
+
+@pytest.mark.parametrize('order', [4, 7])
+def test_insert_and_delete_everything(order):
+    keys = list(range(500))
+    tree = BTree(order=order)
+    for key in keys:
+        tree.insert(key)
+        tree.insert(key)
+    check_btree(tree, set(keys))
+    random.Random(order).shuffle(keys)
+    for i, key in enumerate(keys):
+        assert tree.delete(key)
+        if i % 50 == 0:
+            check_btree(tree, set(keys[i + 1:]))
+    check_btree(tree, set())
+
+
+def test_convert_to_avl():
+    tree = BTree.from_keys(range(0, 1000, 3), order=6)
+    avl = tree.convert_to_avl(in_place=True)
+    assert list(avl) == list(range(0, 1000, 3))
+    assert len(tree) == 0 and list(tree) == []
+
+
+def test_multiset_is_rejected():
+    with pytest.raises(ValueError):
+        BTree([1, 1], multiset=True)
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compact import NIL, CompactTree, makeCompactAvlTree
+
+
+def check_compact(tree, model):
+    """Check order, parent links and (for AVL) heights and balance against ``model``."""
+    expected = sorted(model)
+    assert tree.in_order_keys() == expected
+    assert tree.size() == len(expected)
+    assert tree.findMin() == (expected[0] if expected else None)
+    assert tree.findMax() == (expected[-1] if expected else None)
+    if tree.root != NIL:
+        assert tree.parent[tree.root] == NIL
+    stack = [tree.root] if tree.root != NIL else []
+    seen = 0
+    while stack:
+        i = stack.pop()
+        seen += 1
+        for child in (tree.left[i], tree.right[i]):
+            if child != NIL:
+                assert tree.parent[child] == i
+                stack.append(child)
+        if tree.tree_type == 'avl':
+            assert abs(tree.get_balance(i)) <= 1
+            assert tree.height[i] == 1 + max(tree._h(tree.left[i]), tree._h(tree.right[i]))
+    assert seen == len(expected)
+
+
+@pytest.mark.parametrize('tree_type', ['bst', 'avl'])
+def test_random_operations(tree_type):
+    rng = random.Random(tree_type)
+    tree = CompactTree(tree_type=tree_type)
+    model = set()
+    for _ in range(20):
+        for _ in range(100):
+            key = rng.randrange(300)
+            if rng.random() < 0.6:
+                assert tree.insert(key) == (key not in model)
+                model.add(key)
+            else:
+                assert tree.delete(key) == (key in model)
+                model.discard(key)
+        check_compact(tree, model)
+        assert (tree.search(key) is not None) == (key in model)
+
+
+def test_freed_slots_are_reused():
+    tree = CompactTree()
+    for key in range(10):
+        tree.insert(key)
+    slots = len(tree.keys)
+    for key in range(0, 10, 2):
+        tree.delete(key)
+    for key in range(20, 25):
+        tree.insert(key)
+    assert len(tree.keys) == slots
+    check_compact(tree, set(range(1, 10, 2)) | set(range(20, 25)))
+
+
+def test_empty_tree_has_no_min_or_max():
+    tree = CompactTree()
+    assert tree.findMin() is None and tree.findMax() is None
+    for key in (5, 3, 8):
+        tree.insert(key)
+    for key in (5, 3, 8):
+        tree.delete(key)
+    assert tree.findMin() is None and tree.findMax() is None
+
+
+def test_bulk_load():
+    keys = [random.Random(0).randrange(1000) for _ in range(500)]
+    tree = makeCompactAvlTree(keys)
+    check_compact(tree, set(keys))
+    assert tree.nbytes() == len(set(keys)) * (8 + 4 * 4)
+    np = pytest.importorskip('numpy')
+    assert makeCompactAvlTree(np.array(keys)).in_order_keys() == sorted(set(keys))
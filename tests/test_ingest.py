@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ingest
+from ingest import INT64_MAX, INT64_MIN, cache_path, load_dataset, parse_keys, read_dataset
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def backend(request, monkeypatch):
+    if request.param == 'array':
+        monkeypatch.setattr(ingest, 'np', None)
+    return request.param
+
+
+def test_parse_keys(backend):
+    text = f"3\n-7 0\t42  {INT64_MAX} {INT64_MIN}\n"
+    keys = parse_keys(text)
+    assert type(keys).__module__ == ('numpy' if backend == 'numpy' else 'array')
+    assert list(keys) == [3, -7, 0, 42, INT64_MAX, INT64_MIN]
+    assert list(parse_keys(text.encode('ascii'))) == list(keys)
+    assert len(parse_keys("")) == 0
+
+
+@pytest.mark.parametrize('key', [INT64_MAX + 1, INT64_MIN - 1, 10 ** 30])
+def test_parse_keys_rejects_int64_overflow(backend, key):
+    with pytest.raises(ValueError, match=str(key)):
+        parse_keys(f"1 {key} 2")
+
+
+def test_read_dataset(tmp_path, backend):
+    path = tmp_path / 'keys.txt'
+    path.write_text("3\n5 1 4 9 9\n")  # keys past the announced count are ignored
+    assert list(read_dataset(str(path))) == [5, 1, 4]
+    path.write_text("")
+    with pytest.raises(ValueError, match="missing size header"):
+        read_dataset(str(path))
+    path.write_text("4\n5 1 4\n")
+    with pytest.raises(ValueError, match="announces 4 keys, found 3"):
+        read_dataset(str(path))
+
+
+def test_load_dataset_cache(tmp_path):
+    path = tmp_path / 'keys.txt'
+    path.write_text("3\n5 1 4\n")
+    npy = cache_path(str(path))
+    assert npy == str(tmp_path / 'keys.npy')
+
+    keys = load_dataset(str(path))
+    assert keys.tolist() == [5, 1, 4] and keys.dtype == np.int64
+    assert isinstance(keys, np.memmap) and not keys.flags.writeable
+    assert os.path.exists(npy) and not os.path.exists(npy + '.tmp')
+
+    # A fresh cache is used as it is, even if it disagrees with the text.
+    np.save(npy, np.array([7], dtype=np.int64))
+    os.utime(npy, (os.path.getmtime(path) + 10,) * 2)
+    assert load_dataset(str(path)).tolist() == [7]
+
+    # A cache older than the text is rebuilt.
+    path.write_text("2\n8 9\n")
+    os.utime(npy, (os.path.getmtime(path) - 10,) * 2)
+    assert load_dataset(str(path)).tolist() == [8, 9]
+    assert load_dataset(str(path), cache=False).tolist() == [8, 9]
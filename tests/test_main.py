@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+
+
+def run(monkeypatch, argv, lines=()):
+    monkeypatch.setattr(sys, 'argv', ['main.py'] + argv)
+    lines = iter(lines)
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(lines))
+
+
+@pytest.mark.parametrize('tree_type', ['btree', 'BTREE'])
+def test_multiset_needs_a_binary_tree(monkeypatch, capsys, tree_type):
+    run(monkeypatch, ['--tree', tree_type, '--multiset'])
+    with pytest.raises(SystemExit) as exit:
+        main.main()
+    assert exit.value.code == 1
+    assert "--multiset is not supported by the BTREE tree" in capsys.readouterr().out
+
+
+def test_multiset_session(monkeypatch, capsys):
+    run(monkeypatch, ['--multiset', '--tree', 'avl'], ['5', '3 1 3 2 3', 'print', 'remove', '2', '3 3', 'print', 'exit'])
+    with pytest.raises(SystemExit):
+        main.main()
+    out = capsys.readouterr().out
+    in_order = [line.split(':')[1].split() for line in out.splitlines() if 'In-order' in line]
+    assert in_order == [['1', '2', '3', '3', '3'], ['1', '2', '3']]
+    assert "Removed 2 of 2 values" in out
+
+
+def test_finger_flag(monkeypatch, capsys):
+    built = []
+    real = main.make_tree
+    monkeypatch.setattr(main, 'make_tree', lambda *args, **kwargs: built.append(real(*args, **kwargs)) or built[-1])
+    run(monkeypatch, ['--tree', 'rb', '--finger'], ['3', '2 1 3', 'exit'])
+    with pytest.raises(SystemExit):
+        main.main()
+    assert built[0].use_finger and list(built[0]) == [1, 2, 3]
+    run(monkeypatch, ['--tree', 'btree', '--finger'])
+    with pytest.raises(SystemExit) as exit:
+        main.main()
+    assert exit.value.code == 1
+    assert "--finger is not supported by the BTREE tree" in capsys.readouterr().out
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backends import RedBlackTree
+from bst import AVLTree, BinaryTree
+from invariants import check_tree, post_order
+from snapshot import HEADER, SnapshotView, load, save
+
+
+def shape(tree):
+    return [(node.key, node.count, node.left is not None, node.right is not None) for node in post_order(tree.root)]
+
+
+@pytest.mark.parametrize('tree_class', [BinaryTree, AVLTree])
+@pytest.mark.parametrize('multiset', [False, True])
+@pytest.mark.parametrize('order_stats', [False, True])
+def test_round_trip_keeps_the_shape(tmp_path, tree_class, multiset, order_stats):
+    keys = [random.Random(0).randrange(-10 ** 12, 10 ** 12) for _ in range(500)]
+    if multiset:
+        keys += keys[:100]
+    tree = tree_class(keys, multiset=multiset, order_stats=order_stats)
+    path = str(tmp_path / 'tree.bin')
+    save(tree, path)
+    model = Counter(keys) if multiset else set(keys)
+    for copy in (load(path), SnapshotView(path).to_tree()):
+        assert type(copy) is tree_class
+        assert (copy.multiset, copy.order_stats) == (multiset, order_stats)
+        assert shape(copy) == shape(tree)
+        check_tree(copy, model)
+    with SnapshotView(path) as view:
+        assert len(view) == len(shape(tree))
+        assert list(view.iter_pre_order()) == list(tree.iter_pre_order())
+        assert list(view.iter_in_order()) == list(tree)
+        assert view.findMin() == tree.findMin()
+
+
+def test_empty_tree(tmp_path):
+    path = tmp_path / 'empty.bin'  # path-like objects work as well
+    save(AVLTree(), path)
+    assert os.path.getsize(path) == HEADER.size
+    tree = load(path)
+    assert tree.root is None and len(tree) == 0 and tree.height() == 0
+    with SnapshotView(path) as view:
+        assert len(view) == 0 and view.findMin() is None
+        assert list(view.iter_in_order()) == []
+
+
+def test_unsupported_trees_and_keys(tmp_path):
+    path = str(tmp_path / 'tree.bin')
+    with pytest.raises(ValueError, match="rb"):
+        save(RedBlackTree([1, 2]), path)
+    save(BinaryTree([1, 2, 3]), path)
+    with pytest.raises(ValueError, match="64-bit"):
+        save(BinaryTree([1, 2 ** 70]), path)
+    assert list(load(path)) == [1, 2, 3]  # the previous snapshot survives
+    assert os.listdir(tmp_path) == ['tree.bin']
+    with pytest.raises(ValueError, match="64-bit"):
+        save(BinaryTree([-2 ** 63 - 1]), str(tmp_path / 'new.bin'))
+    assert not os.path.exists(tmp_path / 'new.bin')
+
+
+@pytest.mark.parametrize('multiset', [False, True])
+def test_damaged_files_are_rejected(tmp_path, multiset):
+    path = str(tmp_path / 'tree.bin')
+    save(AVLTree([5, 3, 8, 3], multiset=multiset), path)
+    data = open(path, 'rb').read()
+    for damaged in (data[:-1], data + b'\0', data[:HEADER.size], data[:HEADER.size - 1], b'',
+                    b'NOTATREE' + data[8:]):
+        with open(path, 'wb') as file:
+            file.write(damaged)
+        with pytest.raises(ValueError):
+            load(path)
+        with pytest.raises(ValueError):
+            SnapshotView(path)
@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import sys
+from collections import deque
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bst import AVLTree, BinaryTree
+from tikz import EXPORTERS, NULL_KEY, export, walk
+
+KEYS = [50, 30, 70, 20, 40, 80, 10, 45, 90]  # 20, 40, 70 and 80 have only one child
+PRE_ORDER = [50, 30, 20, 10, 40, 45, 70, 80, 90]
+
+
+def shape(node):
+    """The tree under ``node`` as nested ``(key, left, right)`` tuples."""
+    if node is None:
+        return None
+    return node.key, shape(node.left), shape(node.right)
+
+
+def json_shape(data):
+    if data is None:
+        return None
+    return data['key'], json_shape(data.get('left')), json_shape(data.get('right'))
+
+
+def export_text(tmp_path, root, format, **caps):
+    path = str(tmp_path / f'tree{EXPORTERS[format][1]}')
+    export(root, path, format=format, **caps)
+    with open(path) as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('caps, written, summaries', [
+    ({}, PRE_ORDER, []),
+    ({'max_depth': 1}, [50, 30, 70], [2, 2, 2]),
+    ({'max_nodes': 4}, [50, 30, 20, 10], [2, 3]),
+    ({'max_depth': 0, 'max_nodes': 1}, [50], [5, 3]),
+])
+def test_walk_caps(caps, written, summaries):
+    tree = BinaryTree(KEYS)
+    events = list(walk(tree.root, **caps))
+    assert [node.key for event, node, _ in events if event == 'node'] == written
+    assert [node.size() for event, node, _ in events if event == 'summary'] == summaries
+    assert sum(summaries) + len(written) == len(KEYS)
+    assert sum(event == 'end' for event, _, _ in events) == sum(
+        1 for event, node, _ in events if event == 'node' and (node.left or node.right))
+
+
+def test_walk_marks_missing_children():
+    events = [(event, node.key if node else None) for event, node, _ in walk(BinaryTree([2, 1]).root)]
+    assert events == [('node', 2), ('node', 1), ('missing', None), ('end', 2)]
+    assert list(walk(None)) == []
+
+
+def test_tikz(tmp_path):
+    text = export_text(tmp_path, BinaryTree(KEYS).root, 'tikz', max_depth=2)
+    assert text.startswith("\\begin{TikzTreeStyle}") and text.endswith("\\end{TikzTreeStyle}")
+    body = text.split('\n', 1)[1].rsplit('\\path', 1)[0]
+    assert body.count('{') == body.count('}')
+    assert re.findall(r'node \{(\d+)\}', body) == ['50', '30', '20', '40', '70', '80']
+    assert re.findall(r'\$\\ldots\$ \((\d+)\)', body) == ['1', '1', '1']
+    assert body.count('child[missing]') == 4
+
+
+def test_dot(tmp_path):
+    text = export_text(tmp_path, BinaryTree(KEYS).root, 'dot', max_nodes=6)
+    assert text.startswith("digraph tree {") and text.rstrip().endswith("}")
+    labels = dict(re.findall(r'(n\d+) \[label="([^"]+)"', text))
+    edges = re.findall(r'(n\d+) -> (n\d+)(?: \[style=invis\])?;', text)
+    visible = [(labels[a], labels[b]) for a, b in re.findall(r'(n\d+) -> (n\d+);', text)]
+    assert sorted(labels.values()) == sorted(['50', '30', '20', '10', '40', '45', '... (3)'])
+    assert ('50', '... (3)') in visible and ('40', '45') in visible
+    assert len(edges) == len(re.findall(r'^  n\d+ \[', text, re.M)) - 1  # one parent for all but the root
+
+
+@pytest.mark.parametrize('tree', [BinaryTree(KEYS), AVLTree(range(100)), BinaryTree(range(200)), BinaryTree()])
+def test_json_round_trip(tmp_path, tree):
+    data = json.loads(export_text(tmp_path, tree.root, 'json'))
+    assert json_shape(data) == shape(tree.root)
+
+
+def test_json_summary_counts(tmp_path):
+    data = json.loads(export_text(tmp_path, BinaryTree(KEYS).root, 'json', max_depth=1))
+    assert data['key'] == 50
+    assert data['left'] == {'key': 30, 'left': {'summary': 2}, 'right': {'summary': 2}}
+    assert data['right'] == {'key': 70, 'left': None, 'right': {'summary': 2}}
+
+
+def from_level_order(keys):
+    """Rebuild ``(key, left, right)`` tuples from a level-order dump."""
+    keys = iter(keys)
+    first = next(keys, None)
+    if first is None:
+        return None
+    root = [first, None, None]
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for side in (1, 2):
+            key = next(keys, NULL_KEY)
+            if key != NULL_KEY:
+                node[side] = [key, None, None]
+                queue.append(node[side])
+    freeze = lambda node: node and (node[0], freeze(node[1]), freeze(node[2]))
+    return freeze(root)
+
+
+@pytest.mark.parametrize('keys', [KEYS, list(range(50)), [1], []])
+def test_level_order(tmp_path, keys):
+    np = pytest.importorskip('numpy')
+    tree = BinaryTree(keys)
+    path = str(tmp_path / 'tree.bin')
+    export(tree.root, path, format='levelorder')
+    dump = np.fromfile(path, '<i8')
+    assert len(dump) <= 2 * len(keys) + 1
+    assert len(dump) == 0 or dump[-1] != NULL_KEY
+    assert from_level_order(dump.tolist()) == shape(tree.root)
+
+
+def test_level_order_rejects_the_null_key(tmp_path):
+    with pytest.raises(ValueError, match="reserved"):
+        export(BinaryTree([3, NULL_KEY, 5]).root, str(tmp_path / 'tree.bin'), format='levelorder')
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="unknown export format"):
+        export(BinaryTree(KEYS).root, str(tmp_path / 'tree.svg'), format='svg')
+    assert os.listdir(tmp_path) == []
@@ -1,33 +1,187 @@
-def export(node, filename):
-    def node_to_tikz(node, indent=""):
-        if not node:
-            return f"{indent}child[missing] {{}}\n", True
-
-        node_text = f"{indent}node {{{node.key}}}"
-
-        children_text = ""
-        if node.left or node.right:
-            children_text += " {"
-            if node.left:
-                left_text, _ = node_to_tikz(node.left, indent + "  ")
-                children_text += "\n" + left_text
-            else:
-                children_text += "\n" + f"{indent}  child[missing] {{}}"
+import json
+import sys
+from array import array
+from collections import deque
+
+MAX_INDENT = 32  # deeper levels reuse this indentation instead of growing it
+FLUSH_PARTS = 4096
+NULL_KEY = -2 ** 63  # null marker in level-order dumps
+
+EXPORTERS = {}
+
+
+def register_exporter(name, extension, binary=False):
+    """Register ``writer(root, file, max_depth, max_nodes)`` as export format ``name``."""
+    def decorator(writer):
+        EXPORTERS[name] = (writer, extension, binary)
+        return writer
+    return decorator
+
+
+def export(node, filename, max_depth=None, max_nodes=None, format='tikz'):
+    """Stream the tree rooted at ``node`` to ``filename`` in the given format.
+
+    Subtrees below ``max_depth`` levels, or left over once ``max_nodes``
+    keys have been written, are collapsed into one summary node showing how
+    many keys they hold.
+    """
+    if format not in EXPORTERS:
+        raise ValueError(f"unknown export format {format!r} (choose from {', '.join(EXPORTERS)})")
+    writer, _, binary = EXPORTERS[format]
+    with open(filename, 'wb' if binary else 'w', buffering=1 << 20) as file:
+        writer(node, file, max_depth, max_nodes)
+
+
+def walk(root, max_depth=None, max_nodes=None):
+    """Iterative pre-order walk shared by the exporters.
+
+    Yields ``(event, node, depth)`` where event is 'node' (a key to write;
+    two child events and an 'end' follow if it has any child), 'summary'
+    (a collapsed subtree), 'missing' (the absent sibling of an only child)
+    or 'end'.
+    """
+    written = 0
+    stack = [('node', root, 0)] if root is not None else []
+    while stack:
+        event, node, depth = stack.pop()
+        if event == 'node':
+            if (max_depth is not None and depth > max_depth) or (max_nodes is not None and written >= max_nodes):
+                yield 'summary', node, depth
+                continue
+            written += 1
+            yield 'node', node, depth
+            if node.left or node.right:
+                # Pushed in reverse so they come out left to right.
+                stack.append(('end', node, depth))
+                stack.append(('node', node.right, depth + 1) if node.right else ('missing', None, depth + 1))
+                stack.append(('node', node.left, depth + 1) if node.left else ('missing', None, depth + 1))
+        else:
+            yield event, node, depth
 
-            if node.right:
-                right_text, _ = node_to_tikz(node.right, indent + "  ")
-                children_text += "\n" + right_text
+
+def _flush(file, parts):
+    file.write("".join(parts))
+    parts.clear()
+
+
+@register_exporter('tikz', '.tex')
+def write_tikz(root, file, max_depth=None, max_nodes=None):
+    indents = ["  " * depth for depth in range(MAX_INDENT + 1)]
+    parts = ["\\begin{TikzTreeStyle}\n"]
+    for event, node, depth in walk(root, max_depth, max_nodes):
+        indent = indents[min(depth, MAX_INDENT)]
+        if event == 'end':
+            parts.append(f"\n{indent}}}")
+            continue
+        if depth:
+            parts.append("\n")
+        if event == 'node':
+            parts.append(f"{indent}node {{{node.key}}}")
+            if node.left or node.right:
+                parts.append(" {")
+        elif event == 'summary':
+            parts.append(f"{indent}node {{$\\ldots$ ({node.size()})}}")
+        else:
+            parts.append(f"{indent}child[missing] {{}}")
+        if len(parts) >= FLUSH_PARTS:
+            _flush(file, parts)
+
+    parts.append("\n")
+    parts.append("\\path[draw=none] (0,-3) -- (0,4mm); % Set tikzpicture height to 34mm\n")
+    parts.append("\\end{TikzTreeStyle}")
+    _flush(file, parts)
+
+
+@register_exporter('dot', '.dot')
+def write_dot(root, file, max_depth=None, max_nodes=None):
+    parts = ["digraph tree {\n  node [shape=circle];\n"]
+    parents = []  # ids of the nodes whose children are being written
+    next_id = 0
+    for event, node, depth in walk(root, max_depth, max_nodes):
+        if event == 'end':
+            parents.pop()
+            continue
+        node_id = next_id
+        next_id += 1
+        if event == 'node':
+            parts.append(f'  n{node_id} [label="{node.key}"];\n')
+        elif event == 'summary':
+            parts.append(f'  n{node_id} [label="... ({node.size()})", shape=box];\n')
+        else:
+            parts.append(f'  n{node_id} [style=invis];\n')
+        if parents:
+            style = ' [style=invis]' if event == 'missing' else ''
+            parts.append(f'  n{parents[-1]} -> n{node_id}{style};\n')
+        if event == 'node' and (node.left or node.right):
+            parents.append(node_id)
+        if len(parts) >= FLUSH_PARTS:
+            _flush(file, parts)
+    parts.append("}\n")
+    _flush(file, parts)
+
+
+@register_exporter('json', '.json')
+def write_json(root, file, max_depth=None, max_nodes=None):
+    """Nested ``{"key": k, "left": ..., "right": ...}`` objects; leaves omit both children."""
+    parts = []
+    children_written = []  # per open node: how many of its two children are out
+    for event, node, depth in walk(root, max_depth, max_nodes):
+        if event == 'end':
+            children_written.pop()
+            parts.append("}")
+            continue
+        if children_written:
+            parts.append(', "right": ' if children_written[-1] else '"left": ')
+            children_written[-1] += 1
+        if event == 'node':
+            if node.left or node.right:
+                parts.append(f'{{"key": {json.dumps(node.key)}, ')
+                children_written.append(0)
             else:
-                children_text += "\n" + f"{indent}  child[missing] {{}}"
-            children_text += "\n" + indent + "}"
+                parts.append(f'{{"key": {json.dumps(node.key)}}}')
+        elif event == 'summary':
+            parts.append(f'{{"summary": {node.size()}}}')
+        else:
+            parts.append("null")
+        if len(parts) >= FLUSH_PARTS:
+            _flush(file, parts)
+    if root is None:
+        parts.append("null")
+    parts.append("\n")
+    _flush(file, parts)
+
+
+@register_exporter('levelorder', '.bin', binary=True)
+def write_level_order(root, file, max_depth=None, max_nodes=None):
+    """Raw little-endian int64 keys in level order, ``NULL_KEY`` for missing children.
 
-        return f"{node_text}{children_text}", False
+    Only children of present nodes get a slot and trailing nulls are dropped,
+    so the dump has at most 2n + 1 entries. ``numpy.fromfile(path, '<i8')``
+    reads it directly. The depth/node caps do not apply to this format. A
+    tree holding ``NULL_KEY`` itself cannot be dumped and raises ValueError.
+    """
+    chunk = array('q')
+    pending_nulls = 0
+    queue = deque([root] if root is not None else [])
+    while queue:
+        node = queue.popleft()
+        if node is None:
+            pending_nulls += 1
+            continue
+        if node.key == NULL_KEY:
+            raise ValueError(f"key {NULL_KEY} is reserved as the null marker of level-order dumps")
+        chunk.extend([NULL_KEY] * pending_nulls)
+        pending_nulls = 0
+        chunk.append(node.key)
+        queue.append(node.left)
+        queue.append(node.right)
+        if len(chunk) >= FLUSH_PARTS * 16:
+            _write_int64(file, chunk)
+            chunk = array('q')
+    _write_int64(file, chunk)
 
-    tikz_output, _ = node_to_tikz(node)
-    tikz_string = "\\begin{TikzTreeStyle}\n"
-    tikz_string += tikz_output + "\n"
-    tikz_string += "\\path[draw=none] (0,-3) -- (0,4mm); % Set tikzpicture height to 34mm\n"
-    tikz_string += "\\end{TikzTreeStyle}"
 
-    with open(filename, 'w') as file:
-        file.write(tikz_string)
+def _write_int64(file, chunk):
+    if sys.byteorder == 'big':
+        chunk.byteswap()
+    file.write(chunk.tobytes())